@@ -8,10 +8,10 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-# Change working directory to project root for template resolution
-os.chdir(parent_dir)
+# Keep cold starts short: defer what the first request may not need (see STARTUP_MODE in app.py)
+os.environ.setdefault('STARTUP_MODE', 'serverless')
 
-# Import Flask app
+# Import Flask app (it finds its templates relative to app.py, whatever the working directory)
 from app import app
 
 # Vercel Python runtime expects 'handler' to be the WSGI application
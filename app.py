@@ -1,884 +1,343 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import requests
-import re
-from urllib.parse import quote, urlparse
-import time
+import json
+import hashlib
 import os
-from difflib import SequenceMatcher
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from result_cache import ResultCache, normalize_key
+from handle_index import HandleIndex
+from singleflight import SingleFlight
+from social_finder import SocialMediaFinder
+from jobs import JobStore, JobWorkerPool, QUEUED, FINISHED
+from metrics import REGISTRY, CACHE_EVENTS, COALESCED, CallbackMetric
 
-# Try to load .env file if python-dotenv is installed
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass  # python-dotenv is optional
+# Try to load .env file if python-dotenv is installed (only imported when there is a file to load)
+_DOTENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(_DOTENV_PATH):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(_DOTENV_PATH)
+    except ImportError:
+        pass  # python-dotenv is optional
+
+# STARTUP_MODE=serverless (set by api/index.py) keeps import fast for cold starts: the
+# finder, the result cache, the job store and the asyncio engine are built on first
+# use (by the get_* accessors below), and the handle index loads on a background
+# thread, so an instance only pays for what its requests touch. The default, eager,
+# builds everything before the first request.
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'eager')
 
 app = Flask(__name__, template_folder='templates')
 CORS(app)
 
-class SocialMediaFinder:
-    def __init__(self, google_api_key=None, google_cse_id=None):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.google_api_key = google_api_key or os.getenv('GOOGLE_API_KEY')
-        self.google_cse_id = google_cse_id or os.getenv('GOOGLE_CSE_ID')
-    
-    def _similarity(self, a, b):
-        """Calculate similarity between two strings"""
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-    
-    def find_social_links(self, business_name, country):
-        """
-        Find Instagram and Facebook links for a business using multiple methods
-        """
-        results = {
-            'instagram': None,
-            'facebook': None,
-            'website': None,
-            'confidence': 'low',
-            'sources': []
-        }
-        
-        all_instagram_candidates = []
-        all_facebook_candidates = []
-        all_website_candidates = []
-        
-        # Method 1: Google Custom Search API (if available)
-        api_quota_exceeded = False
-        if self.google_api_key and self.google_cse_id:
-            api_results = self._search_google_api(business_name, country)
-            if api_results is None:
-                # API returned None - could be quota exceeded, will use fallback
-                api_quota_exceeded = True
-            elif api_results:
-                results['sources'].append('Google Custom Search API')
-                if api_results.get('instagram'):
-                    all_instagram_candidates.append(api_results['instagram'])
-                if api_results.get('facebook'):
-                    all_facebook_candidates.append(api_results['facebook'])
-                if api_results.get('website'):
-                    all_website_candidates.append(api_results['website'])
-        
-        # Method 2: Google Web Search (fallback - always runs, but especially if API quota exceeded)
-        google_results = None
-        if api_quota_exceeded or not all_instagram_candidates or not all_facebook_candidates:
-            google_results = self._search_google(business_name, country)
-        if google_results:
-            if 'Google Custom Search API' not in results['sources']:
-                results['sources'].append('Google Web Search')
-            if google_results.get('instagram'):
-                all_instagram_candidates.append(google_results['instagram'])
-            if google_results.get('facebook'):
-                all_facebook_candidates.append(google_results['facebook'])
-            if google_results.get('website'):
-                all_website_candidates.append(google_results['website'])
-        
-        # Method 3: Direct Instagram/Facebook search with variations
-        # Always try direct search as it can find more accurate results
-        instagram_link = self._search_instagram_direct(business_name, country)
-        if instagram_link and instagram_link not in all_instagram_candidates:
-            all_instagram_candidates.append(instagram_link)
-            if 'Instagram Direct Search' not in results['sources']:
-                results['sources'].append('Instagram Direct Search')
-        
-        facebook_link = self._search_facebook_direct(business_name, country)
-        if facebook_link and facebook_link not in all_facebook_candidates:
-            all_facebook_candidates.append(facebook_link)
-            if 'Facebook Direct Search' not in results['sources']:
-                results['sources'].append('Facebook Direct Search')
-        
-        # Method 4: Search for official website
-        website_link = self._search_website(business_name, country)
-        if website_link:
-            all_website_candidates.append(website_link)
-            if 'Website Search' not in results['sources']:
-                results['sources'].append('Website Search')
-        
-        # Method 5: Verify and select best candidates
-        # Prioritize direct search results (they're usually more accurate)
-        verified_instagram = None
-        verified_facebook = None
-        
-        # Sort candidates: direct search results first, then others
-        instagram_direct = [c for c in all_instagram_candidates if 'Direct Search' in str(c) or any('Direct Search' in s for s in results.get('sources', []))]
-        instagram_others = [c for c in all_instagram_candidates if c not in instagram_direct]
-        instagram_prioritized = instagram_direct + instagram_others
-        
-        # For Instagram, try direct search variations first
-        direct_instagram = self._search_instagram_direct(business_name, country)
-        if direct_instagram:
-            instagram_prioritized.insert(0, direct_instagram)
-        
-        for candidate in instagram_prioritized:
-            if self._verify_instagram_link(candidate, business_name):
-                verified_instagram = candidate
-                break
-        
-        # Sort Facebook candidates: direct search results first
-        facebook_direct = [c for c in all_facebook_candidates if 'Direct Search' in str(c) or any('Direct Search' in s for s in results.get('sources', []))]
-        facebook_others = [c for c in all_facebook_candidates if c not in facebook_direct]
-        facebook_prioritized = facebook_direct + facebook_others
-        
-        # For Facebook, try direct search variations first
-        direct_facebook = self._search_facebook_direct(business_name, country)
-        if direct_facebook:
-            facebook_prioritized.insert(0, direct_facebook)
-        
-        for candidate in facebook_prioritized:
-            if self._verify_facebook_link(candidate, business_name):
-                verified_facebook = candidate
-                break
-        
-        results['instagram'] = verified_instagram
-        results['facebook'] = verified_facebook
-        
-        # Verify and select best website candidate
-        verified_website = None
-        for candidate in all_website_candidates:
-            if self._verify_website_link(candidate, business_name):
-                verified_website = candidate
-                break
-        
-        results['website'] = verified_website
-        
-        # Determine confidence level
-        verified_count = sum([
-            bool(verified_instagram),
-            bool(verified_facebook),
-            bool(verified_website)
-        ])
-        
-        if verified_count >= 2:
-            results['confidence'] = 'high'
-        elif verified_count == 1:
-            results['confidence'] = 'medium'
-        else:
-            results['confidence'] = 'low'
-        
-        return results
-    
-    def _search_google_api(self, business_name, country):
-        """
-        Search using Google Custom Search API (more reliable)
-        """
-        if not self.google_api_key or not self.google_cse_id:
-            return None
-        
-        # Separate queries for social media and websites
-        social_queries = [
-            f"{business_name} {country} instagram",
-            f"{business_name} {country} facebook",
-            f'"{business_name}" {country} site:instagram.com',
-            f'"{business_name}" {country} site:facebook.com',
-            f"{business_name} {country} facebook page",
-            f"{business_name} facebook {country}"
-        ]
-        
-        website_queries = [
-            f'"{business_name}" {country} official website',
-            f"{business_name} {country} website",
-            f"{business_name} {country} site"
-        ]
-        
-        instagram_link = None
-        facebook_link = None
-        website_link = None
-        
-        try:
-            # First, search for social media
-            for query in social_queries:
-                url = "https://www.googleapis.com/customsearch/v1"
-                params = {
-                    'key': self.google_api_key,
-                    'cx': self.google_cse_id,
-                    'q': query
-                }
-                response = self.session.get(url, params=params, timeout=10)
-                
-                # Check for quota/rate limit errors
-                if response.status_code == 403:
-                    try:
-                        error_data = response.json() if response.text else {}
-                        error_message = error_data.get('error', {}).get('message', '')
-                        if 'quota' in error_message.lower() or 'limit' in error_message.lower():
-                            print(f"Google API quota exceeded. Falling back to web scraping.")
-                            return None  # Return None to trigger fallback
-                    except:
-                        pass
-                
-                if response.status_code == 429:
-                    print(f"Google API rate limit exceeded. Falling back to web scraping.")
-                    return None  # Return None to trigger fallback
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'items' in data:
-                        for item in data['items']:
-                            link = item.get('link', '')
-                            snippet = item.get('snippet', '') or item.get('htmlSnippet', '')
-                            
-                            # Prioritize Instagram
-                            if 'instagram.com' in link and not instagram_link:
-                                instagram_link = self._normalize_instagram_url(link)
-                            # Then Facebook
-                            elif 'facebook.com' in link and not facebook_link:
-                                facebook_link = self._normalize_facebook_url(link)
-                            # Then check for websites (but skip if it's social media)
-                            elif not website_link and self._is_likely_website(link, business_name):
-                                # Additional check: make sure it's not a directory/review site
-                                skip_domains = ['yelp', 'tripadvisor', 'zomato', 'foursquare', 
-                                               'opentable', 'google.com/maps', 'google.com/search']
-                                if not any(skip in link.lower() for skip in skip_domains):
-                                    website_link = link
-                            
-                            # Also try to extract website from snippet text
-                            if not website_link and snippet:
-                                extracted = self._extract_website_from_text(snippet, business_name)
-                                if extracted:
-                                    website_link = extracted
-                            
-                            if instagram_link and facebook_link:
-                                break
-                
-                time.sleep(0.5)  # Rate limiting
-            
-            # Then, search specifically for websites
-            for query in website_queries:
-                url = "https://www.googleapis.com/customsearch/v1"
-                params = {
-                    'key': self.google_api_key,
-                    'cx': self.google_cse_id,
-                    'q': query
-                }
-                response = self.session.get(url, params=params, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'items' in data:
-                        for item in data['items']:
-                            link = item.get('link', '')
-                            snippet = item.get('snippet', '') or item.get('htmlSnippet', '')
-                            
-                            # Skip social media links in website search
-                            if 'instagram.com' in link or 'facebook.com' in link:
-                                continue
-                            
-                            # Check if link is a website
-                            if not website_link and self._is_likely_website(link, business_name):
-                                skip_domains = ['yelp', 'tripadvisor', 'zomato', 'foursquare', 
-                                               'opentable', 'google.com', 'bing.com', 'yahoo.com',
-                                               'wikipedia.org', 'support.google', 'maps.google']
-                                if not any(skip in link.lower() for skip in skip_domains):
-                                    website_link = link
-                            
-                            # Also try to extract website from snippet text
-                            if not website_link and snippet:
-                                extracted = self._extract_website_from_text(snippet, business_name)
-                                if extracted:
-                                    website_link = extracted
-                            
-                            if website_link:
-                                break
-                
-                if website_link:
-                    break
-                
-                time.sleep(0.5)  # Rate limiting
-                
-        except requests.exceptions.RequestException as e:
-            # Network errors - fall back to web scraping
-            print(f"Google API network error: {e}. Falling back to web scraping.")
-            return None
-        except Exception as e:
-            error_str = str(e).lower()
-            if 'quota' in error_str or 'limit' in error_str or '403' in error_str or '429' in error_str:
-                print(f"Google API quota/limit error: {e}. Falling back to web scraping.")
-                return None
-            print(f"Google API search error: {e}")
-        
-        result = {}
-        if instagram_link:
-            result['instagram'] = instagram_link
-        if facebook_link:
-            result['facebook'] = facebook_link
-        if website_link:
-            result['website'] = website_link
-        
-        return result if result else None
-    
-    def _search_google(self, business_name, country):
-        """
-        Search Google for business social media links (web scraping fallback)
-        """
-        queries = [
-            f"{business_name} {country} instagram",
-            f"{business_name} {country} facebook",
-            f'"{business_name}" {country} official website',
-            f"{business_name} {country} website"
-        ]
-        
-        instagram_link = None
-        facebook_link = None
-        website_link = None
-        
-        for query in queries:
-            try:
-                search_url = f"https://www.google.com/search?q={quote(query)}"
-                response = self.session.get(search_url, timeout=10)
-                
-                if response.status_code == 200:
-                    content = response.text
-                    if not instagram_link:
-                        instagram_link = self._extract_instagram_from_text(content)
-                    if not facebook_link:
-                        facebook_link = self._extract_facebook_from_text(content)
-                    # Always try to extract website, even if we already have instagram/facebook
-                    if not website_link:
-                        website_link = self._extract_website_from_text(content, business_name)
-                    
-                    # Don't break early - continue searching for website even if we have social media
-                    if instagram_link and facebook_link and website_link:
-                        break
-                
-                time.sleep(1)  # Be respectful with rate limiting
-            except Exception as e:
-                print(f"Google search error: {e}")
-        
-        result = {}
-        if instagram_link:
-            result['instagram'] = instagram_link
-        if facebook_link:
-            result['facebook'] = facebook_link
-        if website_link:
-            result['website'] = website_link
-        
-        return result if result else None
-    
-    def _search_instagram_direct(self, business_name, country):
-        """
-        Try to construct or find Instagram link directly using common patterns
-        """
-        # Generate possible username variations
-        variations = self._generate_username_variations(business_name, country)
-        
-        for variation in variations:
-            potential_url = f"https://www.instagram.com/{variation}/"
-            if self._verify_instagram_link(potential_url, business_name):
-                return potential_url
-        
-        return None
-    
-    def _get_country_code(self, country):
-        """Get country code abbreviation from country name"""
-        country_lower = country.lower().strip()
-        country_codes = {
-            'kuwait': 'kw', 'saudi arabia': 'sa', 'uae': 'ae', 'united arab emirates': 'ae',
-            'qatar': 'qa', 'bahrain': 'bh', 'oman': 'om', 'jordan': 'jo',
-            'lebanon': 'lb', 'egypt': 'eg', 'iraq': 'iq', 'syria': 'sy',
-            'usa': 'us', 'united states': 'us', 'uk': 'gb', 'united kingdom': 'gb',
-            'canada': 'ca', 'australia': 'au', 'france': 'fr', 'germany': 'de',
-            'italy': 'it', 'spain': 'es', 'netherlands': 'nl', 'belgium': 'be',
-            'switzerland': 'ch', 'austria': 'at', 'sweden': 'se', 'norway': 'no',
-            'denmark': 'dk', 'finland': 'fi', 'poland': 'pl', 'portugal': 'pt',
-            'greece': 'gr', 'turkey': 'tr', 'india': 'in', 'china': 'cn',
-            'japan': 'jp', 'south korea': 'kr', 'singapore': 'sg', 'malaysia': 'my',
-            'thailand': 'th', 'indonesia': 'id', 'philippines': 'ph', 'vietnam': 'vn',
-            'brazil': 'br', 'mexico': 'mx', 'argentina': 'ar', 'chile': 'cl',
-            'colombia': 'co', 'peru': 'pe', 'south africa': 'za', 'nigeria': 'ng',
-            'kenya': 'ke', 'israel': 'il', 'pakistan': 'pk', 'bangladesh': 'bd'
-        }
-        return country_codes.get(country_lower, '')
-    
-    def _generate_username_variations(self, business_name, country=None):
-        """Generate possible username variations from business name"""
-        name_lower = business_name.lower()
-        variations = []
-        
-        # Remove common business suffixes
-        suffixes = [' inc', ' inc.', ' llc', ' ltd', ' ltd.', ' corp', ' corp.', ' company', ' co', ' co.', ' studios', ' studio']
-        clean_name = name_lower
-        for suffix in suffixes:
-            if clean_name.endswith(suffix):
-                clean_name = clean_name[:-len(suffix)].strip()
-        
-        # Generate base variations
-        base_variations = [
-            clean_name.replace(' ', ''),
-            clean_name.replace(' ', '_'),
-            clean_name.replace(' ', '.'),
-            clean_name.replace("'", ''),
-            clean_name.replace("'", '').replace(' ', ''),
-            re.sub(r'[^a-zA-Z0-9]', '', clean_name),
-        ]
-        
-        # Handle abbreviations (e.g., "mb vision" -> "mbvision")
-        words = clean_name.split()
-        if len(words) > 1:
-            # First letter of each word
-            abbreviation = ''.join([w[0] for w in words if w])
-            if len(abbreviation) >= 2:
-                # Combine abbreviation with remaining words
-                remaining = ''.join([w for w in words[1:] if w])
-                if remaining:
-                    base_variations.append(abbreviation + remaining)
-                    base_variations.append(abbreviation.lower() + remaining.lower())
-        
-        # Add country code variations if country is provided
-        if country:
-            country_code = self._get_country_code(country)
-            if country_code:
-                # Add country code to base variations
-                for base_var in base_variations[:]:
-                    if base_var:  # Only if base variation exists
-                        variations.append(base_var + country_code)
-                        variations.append(base_var + '_' + country_code)
-                        variations.append(base_var + '.' + country_code)
-        
-        # Add original base variations
-        variations.extend(base_variations)
-        
-        # Remove duplicates and filter
-        seen = set()
-        unique_variations = []
-        for var in variations:
-            if var and var not in seen and len(var) > 2:
-                seen.add(var)
-                unique_variations.append(var)
-        
-        return unique_variations[:20]  # Increased limit to 20 for better coverage
-    
-    def _search_facebook_direct(self, business_name, country):
-        """
-        Try to find Facebook page using direct URL patterns
-        """
-        # Generate possible page name variations (with country codes)
-        variations = self._generate_username_variations(business_name, country)
-        
-        # Also try searching with more specific Facebook queries
-        # Facebook pages often use country codes, so prioritize those
-        country_code = self._get_country_code(country) if country else ''
-        
-        # Reorder variations to try country code variations first
-        prioritized_variations = []
-        other_variations = []
-        
-        for var in variations:
-            if country_code and country_code in var.lower():
-                prioritized_variations.append(var)
-            else:
-                other_variations.append(var)
-        
-        # Try prioritized variations first
-        for variation in prioritized_variations + other_variations:
-            potential_url = f"https://www.facebook.com/{variation}/"
-            if self._verify_facebook_link(potential_url, business_name):
-                return potential_url
-        
-        return None
-    
-    def _extract_instagram_from_text(self, text):
-        """
-        Extract Instagram URL from text content
-        """
-        patterns = [
-            r'https?://(?:www\.)?instagram\.com/([a-zA-Z0-9_.]+)/?',
-            r'instagram\.com/([a-zA-Z0-9_.]+)/?',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                username = matches[0].split('/')[0].split('?')[0].split('#')[0]
-                if username and len(username) > 1:
-                    return self._normalize_instagram_url(f"https://www.instagram.com/{username}/")
-        
-        return None
+# Guards the first build of each lazily built object below (reentrant, since the
+# asyncio engine shares the sync finder's stores)
+_build_lock = threading.RLock()
+
+finder = None
+
+def get_finder():
+    """The sync lookup engine (with its transport, negative cache and probe stats), built on first use"""
+    global finder
+    if finder is None:
+        with _build_lock:
+            if finder is None:
+                finder = SocialMediaFinder(
+                    google_api_key=os.getenv('GOOGLE_API_KEY'),
+                    google_cse_id=os.getenv('GOOGLE_CSE_ID')
+                )
+    return finder
+
+# FINDER_ENGINE=async runs lookups on the asyncio engine (see async_finder.py)
+# instead of blocking a thread per outbound request
+FINDER_ENGINE = os.getenv('FINDER_ENGINE', 'sync')
+async_finder = None
+
+def get_async_finder():
+    """The asyncio engine, built on first use (importing aiohttp is slow), or None with the sync engine"""
+    global async_finder
+    if async_finder is None and FINDER_ENGINE == 'async':
+        with _build_lock:
+            if async_finder is None:
+                from async_finder import AsyncSocialMediaFinder
+                shared = get_finder()
+                async_finder = AsyncSocialMediaFinder(
+                    google_api_key=os.getenv('GOOGLE_API_KEY'),
+                    google_cse_id=os.getenv('GOOGLE_CSE_ID'),
+                    negative_cache=shared.negative_cache,
+                    cse_keys=shared.cse_keys,
+                    dns_cache=shared.dns_cache,
+                    probe_stats=shared.probe_stats
+                )
+    return async_finder
+
+def run_finder(business_name, country, timeout=None):
+    """Run a lookup on the configured engine, within timeout seconds if given"""
+    engine = get_async_finder()
+    if engine is not None:
+        return engine.find_social_links_blocking(business_name, country, timeout)
+    return get_finder().find_social_links(business_name, country, timeout)
+
+result_cache = None
+_result_cache_built = False
+
+def get_result_cache():
+    """The persistent result cache, opened on first use, or None when it is disabled"""
+    global result_cache, _result_cache_built
+    if not _result_cache_built:
+        with _build_lock:
+            if not _result_cache_built:
+                result_cache = ResultCache.from_env()
+                _result_cache_built = True
+    return result_cache
+
+# Verified links from earlier high-confidence lookups (and bulk imports), matched by fuzzy name
+handle_index = HandleIndex.from_env(preload=STARTUP_MODE != 'serverless')
+
+REGISTRY.register(CallbackMetric(
+    'social_finder_negative_cache_entries', 'Dead candidate URLs currently remembered, by failure kind', ['kind'],
+    lambda: {(kind,): count for kind, count in get_finder().negative_cache.stats()['entries'].items()}
+))
+REGISTRY.register(CallbackMetric(
+    'social_finder_negative_cache_hits_total', 'Probes skipped because the URL was known to be dead', [],
+    lambda: {(): get_finder().negative_cache.stats()['hits']}, metric_type='counter'
+))
+REGISTRY.register(CallbackMetric(
+    'social_finder_handle_index_entries', 'Verified businesses in the local handle index', [],
+    lambda: {(): len(handle_index)} if handle_index is not None else {}
+))
+REGISTRY.register(CallbackMetric(
+    'social_finder_cse_keys_available', 'Custom Search keys with quota left (1) or blocked (0)', ['key'],
+    lambda: {(key['id'],): int(key['available']) for key in get_finder().cse_keys.health()['keys']}
+))
+REGISTRY.register(CallbackMetric(
+    'social_finder_cse_remaining_quota', 'Estimated Custom Search queries left today across all keys', [],
+    lambda: {(): get_finder().cse_keys.health()['remaining_estimate']}
+))
+
+# Values accepted by the `cache` request parameter
+CACHE_MODES = ('use', 'bypass', 'refresh')
+
+# Identical lookups in flight at the same time share one run
+lookup_flight = SingleFlight()
+
+def lookup(business_name, country, cache_mode='use', timeout=None):
+    """
+    Find social links for a business behind the persistent result cache and
+    the local handle index. cache_mode 'bypass' skips both entirely, 'refresh'
+    ignores them but stores the fresh result. A lookup for a business that is
+    already being looked up (with the same timeout, and bypassing the cache
+    or not alike) waits for that run and returns its result. Results cut short by the timeout are not stored.
+    """
+    if cache_mode == 'use':
+        result_cache = get_result_cache()
+        if result_cache:
+            cached = result_cache.get(business_name, country)
+            CACHE_EVENTS.inc(cache='result', result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                return cached
+        if handle_index is not None:
+            indexed = handle_index.results_for(business_name, country)
+            CACHE_EVENTS.inc(cache='handle_index', result='hit' if indexed is not None else 'miss')
+            if indexed is not None:
+                return indexed
     
-    def _extract_facebook_from_text(self, text):
-        """
-        Extract Facebook URL from text content
-        """
-        patterns = [
-            r'https?://(?:www\.)?facebook\.com/([a-zA-Z0-9_.]+)/?',
-            r'facebook\.com/([a-zA-Z0-9_.]+)/?',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                page = matches[0].split('/')[0].split('?')[0].split('#')[0]
-                if page and len(page) > 1 and page not in ['pages', 'profile', 'people']:
-                    return self._normalize_facebook_url(f"https://www.facebook.com/{page}/")
-        
+    # Bypass runs store nothing, so they're never shared with 'use' or 'refresh' callers, which expect the store
+    flight_key = (normalize_key(business_name, country), cache_mode == 'bypass', timeout)
+    results, shared = lookup_flight.do(flight_key, lambda: _run_lookup(business_name, country, cache_mode, timeout))
+    if shared:
+        COALESCED.inc(level='lookup')
+        return dict(results)
+    return results
+
+def _run_lookup(business_name, country, cache_mode, timeout):
+    results = run_finder(business_name, country, timeout)
+    if cache_mode != 'bypass' and not results.get('partial'):
+        result_cache = get_result_cache()
+        if result_cache:
+            result_cache.set(business_name, country, results)
+        if handle_index is not None and results.get('confidence') == 'high':
+            indexable = indexable_results(results)
+            if indexable is not None:
+                handle_index.add(business_name, country, indexable)
+    return results
+
+def indexable_results(results):
+    """
+    The part of a result worth keeping in the handle index: only the links that scored
+    at least the acceptance threshold, since indexed links answer similar names without
+    being checked again. None unless two links (a high-confidence result) remain.
+    """
+    scores = results.get('scores') or {}
+    links = {}
+    for kind in ('instagram', 'facebook', 'website'):
+        link = results.get(kind)
+        if link and (scores.get(kind) or {}).get(link, 0.0) >= get_finder().score_accept:
+            links[kind] = link
+    if len(links) < 2:
         return None
-    
-    def _normalize_instagram_url(self, url):
-        """Normalize Instagram URL format"""
-        match = re.search(r'instagram\.com/([a-zA-Z0-9_.]+)', url, re.IGNORECASE)
-        if match:
-            username = match.group(1).split('/')[0].split('?')[0]
-            return f"https://www.instagram.com/{username}/"
-        return url
-    
-    def _normalize_facebook_url(self, url):
-        """Normalize Facebook URL format"""
-        match = re.search(r'facebook\.com/([a-zA-Z0-9_.]+)', url, re.IGNORECASE)
-        if match:
-            page = match.group(1).split('/')[0].split('?')[0]
-            return f"https://www.facebook.com/{page}/"
-        return url
-    
-    def _is_likely_website(self, url, business_name):
-        """Check if a URL is likely an official business website"""
-        if not url:
-            return False
-        
-        url_lower = url.lower()
-        
-        # Skip social media and common non-business sites
-        skip_domains = [
-            'facebook.com', 'instagram.com', 'twitter.com', 'linkedin.com',
-            'youtube.com', 'tiktok.com', 'pinterest.com', 'snapchat.com',
-            'google.com', 'maps.google.com', 'support.google.com', 'google.com/maps', 'google.com/search',
-            'yelp.com', 'tripadvisor.com', 'foursquare.com', 'zomato.com', 'opentable.com', 
-            'wikipedia.org', 'maps.apple.com', 'bing.com', 'yahoo.com', 'duckduckgo.com',
-            'search.yahoo.com', 'search.bing.com'
-        ]
-        
-        for domain in skip_domains:
-            if domain in url_lower:
-                return False
-        
-        # Must be http/https
-        if not url_lower.startswith(('http://', 'https://')):
-            return False
-        
-        # Prefer .com, .net, .org, country-specific TLDs
-        valid_tlds = ['.com', '.net', '.org', '.co', '.io', '.me', '.info', '.biz',
-                      '.ae', '.kw', '.sa', '.qa', '.bh', '.om', '.jo', '.lb', '.eg']
-        has_valid_tld = any(tld in url_lower for tld in valid_tlds)
-        
-        return has_valid_tld
-    
-    def _extract_website_from_text(self, text, business_name):
-        """Extract website URL from text content"""
-        # Look for common website patterns - improved regex
-        patterns = [
-            r'https?://(?:www\.)?([a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.(?:com|net|org|co|io|me|info|biz|ae|kw|sa|qa|bh|om|jo|lb|eg)[^/\s"\'<>]*)',
-            r'(?:website|site|visit|www)\.([a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.(?:com|net|org|co|io|me|info|biz|ae|kw|sa|qa|bh|om|jo|lb|eg))',
-            r'<a[^>]*href=["\'](https?://[^"\']+)["\']',
-        ]
-        
-        found_urls = []
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    domain = match[0] if match[0] else (match[1] if len(match) > 1 else None)
-                else:
-                    domain = match
-                
-                if domain:
-                    if domain.startswith('http'):
-                        url = domain
-                    else:
-                        url = f"https://{domain}"
-                    
-                    # Clean up URL
-                    url = url.split('"')[0].split("'")[0].split(' ')[0].split('\n')[0]
-                    
-                    if self._is_likely_website(url, business_name) and url not in found_urls:
-                        found_urls.append(url)
-        
-        # Return the first valid website found
-        return found_urls[0] if found_urls else None
-    
-    def _search_website(self, business_name, country):
-        """Search for official business website"""
-        # Try common domain patterns
-        clean_name = business_name.lower().replace(' ', '').replace("'", '').replace('-', '')
-        clean_name = re.sub(r'[^a-zA-Z0-9]', '', clean_name)
-        
-        # Remove common suffixes
-        suffixes = ['inc', 'llc', 'ltd', 'corp', 'company', 'co', 'studios', 'studio']
-        for suffix in suffixes:
-            if clean_name.endswith(suffix):
-                clean_name = clean_name[:-len(suffix)]
-        
-        # Generate possible domain variations
-        domain_variations = [
-            f"{clean_name}.com",
-            f"www.{clean_name}.com",
-            f"{clean_name}.net",
-            f"{clean_name}.org",
-        ]
-        
-        # Add country-specific variations if country code available
-        country_code = self._get_country_code(country)
-        if country_code:
-            domain_variations.extend([
-                f"{clean_name}{country_code}.com",
-                f"{clean_name}-{country_code}.com",
-                f"{clean_name}.{country_code}",
-                f"www.{clean_name}{country_code}.com",
-            ])
-        
-        # Also try with "vision" or other words if they exist
-        words = business_name.lower().split()
-        if len(words) > 1:
-            # Try first word + last word
-            if len(words) >= 2:
-                short_name = words[0] + words[-1]
-                short_name = re.sub(r'[^a-zA-Z0-9]', '', short_name)
-                domain_variations.extend([
-                    f"{short_name}.com",
-                    f"www.{short_name}.com",
-                ])
-                if country_code:
-                    domain_variations.extend([
-                        f"{short_name}{country_code}.com",
-                        f"{short_name}-{country_code}.com",
-                    ])
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_variations = []
-        for var in domain_variations:
-            if var not in seen:
-                seen.add(var)
-                unique_variations.append(var)
-        
-        for domain_var in unique_variations[:10]:  # Increased limit
-            potential_url = f"https://{domain_var}"
-            if self._verify_website_link(potential_url, business_name):
-                return potential_url
-        
+    return {**results, 'instagram': None, 'facebook': None, 'website': None, **links,
+            'scores': {kind: {link: scores[kind][link]} for kind, link in links.items()}}
+
+def format_find_response(business_name, country, results, include_timings=False):
+    """
+    Build the clean /api/find response body from find_social_links results.
+    include_timings adds the per-stage timings (empty when the result came from the cache).
+    """
+    response = {
+        'business_name': business_name,
+        'country': country if country else None,
+        'instagram': results.get('instagram'),
+        'facebook': results.get('facebook'),
+        'website': results.get('website'),
+        'confidence': results.get('confidence'),
+        'sources': results.get('sources', []),
+        'scores': results.get('scores', {}),
+        'partial': results.get('partial', False),
+        'stages': results.get('stages', {})
+    }
+    if include_timings:
+        response['timings'] = results.get('timings', {})
+    return response
+
+# How long caches (the CDN and browsers) may reuse a GET /api/find response, by
+# confidence, as (max-age, stale-while-revalidate) seconds: fresh for max-age,
+# then served stale for up to stale-while-revalidate more while the cache fetches
+# a new copy in the background. EDGE_CACHE=0 leaves responses without these headers.
+DEFAULT_EDGE_CACHE_LIFETIMES = {
+    'high': (24 * 3600, 7 * 24 * 3600),
+    'medium': (3600, 24 * 3600),
+    'low': (300, 3600),
+}
+
+def edge_cache_lifetimes():
+    """DEFAULT_EDGE_CACHE_LIFETIMES overridden by EDGE_CACHE_MAX_AGE_* and EDGE_CACHE_SWR_*, or None when disabled"""
+    if os.getenv('EDGE_CACHE', '1') == '0':
         return None
-    
-    def _verify_website_link(self, url, business_name):
-        """Verify that the website link is valid and matches the business"""
-        try:
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            
-            if response.status_code == 200:
-                content = response.text.lower()
-                final_url = response.url.lower()
-                
-                # Check for explicit error pages (be more specific to avoid false positives)
-                # Only check in first part of content where error messages typically appear
-                content_sample = content[:5000]
-                
-                # More specific error patterns that indicate actual error pages
-                explicit_errors = [
-                    'page not found',
-                    '404 error',
-                    'error 404',
-                    'not found',
-                    'domain for sale',
-                    'this domain is for sale',
-                    'buy this domain',
-                    'parked domain',
-                    'domain parking'
-                ]
-                
-                # Check if multiple error indicators appear (more likely to be real error)
-                error_count = sum(1 for error in explicit_errors if error in content_sample)
-                if error_count >= 2:  # Multiple error indicators = likely error page
-                    return False
-                
-                # Check for single strong error indicators
-                strong_errors = ['domain for sale', 'this domain is for sale', 'buy this domain', 'parked domain']
-                if any(error in content_sample for error in strong_errors):
-                    return False
-                
-                # Try to extract page title (use original text, not lowercased)
-                title_match = re.search(r'<title[^>]*>([^<]+)</title>', response.text, re.IGNORECASE)
-                og_title_match = re.search(r'<meta[^>]*property=["\']og:title["\'][^>]*content=["\']([^"\']+)["\']', response.text, re.IGNORECASE)
-                
-                title = None
-                if og_title_match:
-                    title = og_title_match.group(1)
-                elif title_match:
-                    title = title_match.group(1)
-                
-                if title:
-                    # Check if business name appears in title (with some similarity)
-                    similarity = self._similarity(business_name, title)
-                    if similarity > 0.2:  # Lowered threshold
-                        return True
-                    # Also check if business name words appear in title
-                    business_words = [w for w in business_name.lower().split() if len(w) > 2]
-                    title_lower = title.lower()
-                    matching_words = sum(1 for word in business_words if word in title_lower)
-                    if business_words and matching_words >= max(1, len(business_words) * 0.4):  # At least 40% match
-                        return True
-                
-                # Check domain name matches business name
-                domain_match = re.search(r'https?://(?:www\.)?([^/]+)', url.lower())
-                if domain_match:
-                    domain = domain_match.group(1)
-                    # Remove TLD
-                    domain_name = re.sub(r'\.[a-z]{2,}$', '', domain)
-                    # Check if business name appears in domain
-                    clean_business = re.sub(r'[^a-z0-9]', '', business_name.lower())
-                    clean_domain = re.sub(r'[^a-z0-9]', '', domain_name)
-                    if clean_business and clean_domain:
-                        if clean_business in clean_domain or clean_domain in clean_business:
-                            return True
-                        # Check if significant portion matches
-                        if len(clean_business) >= 3 and len(clean_domain) >= 3:
-                            # Check for substring match of at least 3 chars
-                            for i in range(len(clean_business) - 2):
-                                substr = clean_business[i:i+3]
-                                if substr in clean_domain:
-                                    return True
-                
-                # If page loads successfully (200) and no strong error indicators, assume valid
-                # Many legitimate sites might not have perfect title matches
-                return True
-            
-            elif response.status_code == 404:
-                return False
-            else:
-                # Other status codes (301, 302, etc.) - check redirect URL
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    redirect_url = response.url
-                    if redirect_url != url:
-                        # Recursively check redirect (but limit to avoid infinite loops)
-                        return self._verify_website_link(redirect_url, business_name)
-                # For other codes, be lenient
-                return True
-                
-        except requests.exceptions.RequestException as e:
-            # Network errors - don't assume invalid, might be temporary
-            print(f"Website verification network error: {e}")
-            return False
-        except Exception as e:
-            print(f"Website verification error: {e}")
-            return False
-    
-    def _verify_instagram_link(self, url, business_name):
-        """
-        Verify that the Instagram link is valid and potentially matches the business
-        """
-        try:
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            if response.status_code == 200:
-                content = response.text.lower()
-                
-                # Check if page doesn't exist
-                error_indicators = [
-                    'page not found',
-                    'sorry, this page',
-                    'user not found',
-                    'this page is not available'
-                ]
-                
-                if any(indicator in content for indicator in error_indicators):
-                    return False
-                
-                # Try to extract profile name and compare with business name
-                # Instagram pages often have the business name in the title or meta tags
-                title_match = re.search(r'<title[^>]*>([^<]+)</title>', content, re.IGNORECASE)
-                if title_match:
-                    title = title_match.group(1)
-                    # Check if business name appears in title (with some similarity threshold)
-                    if self._similarity(business_name, title) > 0.3:
-                        return True
-                
-                # If no error indicators, assume valid
-                return True
-        except Exception as e:
-            print(f"Instagram verification error: {e}")
-        
-        return False
-    
-    def _verify_facebook_link(self, url, business_name):
-        """
-        Verify that the Facebook link is valid and potentially matches the business
-        Facebook requires login for most pages, so we use a more lenient approach
-        """
-        try:
-            # Extract username from URL first
-            username_match = re.search(r'facebook\.com/([^/?]+)', url.lower())
-            if not username_match:
-                return False
-            
-            username = username_match.group(1)
-            if not username or len(username) < 2:
-                return False
-            
-            # Skip common Facebook paths that aren't pages
-            skip_paths = ['pages', 'profile', 'people', 'login', 'home', 'watch', 'marketplace', 'groups', 'events']
-            if username in skip_paths:
-                return False
-            
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            
-            # If we get a 200 response, check for error indicators
-            if response.status_code == 200:
-                content = response.text.lower()
-                final_url = response.url.lower()
-                
-                # Check for explicit error messages (these indicate page doesn't exist)
-                error_indicators = [
-                    'page not found',
-                    'content not available',
-                    'this content is not available',
-                    'sorry, this page',
-                    'this page isn\'t available',
-                    'the link you followed may be broken',
-                    'this page may have been removed',
-                    'no longer available'
-                ]
-                
-                # If we find explicit error messages, page doesn't exist
-                if any(indicator in content for indicator in error_indicators):
-                    return False
-                
-                # If we got here with a 200 response and no errors, the page exists
-                # Facebook may show login page, but that means the page URL is valid
-                return True
-            
-            # For other status codes, be more cautious
-            elif response.status_code == 404:
-                return False
-            else:
-                # For other status codes, assume it might exist (could be temporary issues)
-                return True
-                
-        except requests.exceptions.RequestException as e:
-            # Network errors - don't assume page doesn't exist, try to verify URL structure
-            username_match = re.search(r'facebook\.com/([^/?]+)', url.lower())
-            if username_match:
-                username = username_match.group(1)
-                skip_paths = ['pages', 'profile', 'people', 'login', 'home', 'watch', 'marketplace', 'groups', 'events']
-                if username and len(username) >= 2 and username not in skip_paths:
-                    # URL structure looks valid, assume it exists
-                    return True
-            return False
-        except Exception as e:
-            print(f"Facebook verification error: {e}")
-            return False
-
-finder = SocialMediaFinder(
-    google_api_key=os.getenv('GOOGLE_API_KEY'),
-    google_cse_id=os.getenv('GOOGLE_CSE_ID')
-)
+    lifetimes = {}
+    for confidence, (max_age, stale) in DEFAULT_EDGE_CACHE_LIFETIMES.items():
+        lifetimes[confidence] = (
+            int(os.getenv(f'EDGE_CACHE_MAX_AGE_{confidence.upper()}', max_age)),
+            int(os.getenv(f'EDGE_CACHE_SWR_{confidence.upper()}', stale))
+        )
+    return lifetimes
+
+EDGE_CACHE_LIFETIMES = edge_cache_lifetimes()
+
+def response_etag(body):
+    """Strong ETag of a JSON response body: the same body always gets the same tag"""
+    encoded = json.dumps(body, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+def cacheable_response(body, cacheable):
+    """
+    jsonify body with caching headers for a GET. Cacheable bodies get an ETag and a
+    Cache-Control lifetime from their confidence, and become 304 Not Modified when the
+    request's If-None-Match already names that ETag; the others get no-store.
+    """
+    response = jsonify(body)
+    if EDGE_CACHE_LIFETIMES is None:
+        return response
+    if not cacheable:
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    # s-maxage as well, since Vercel's CDN only stores function responses that set it
+    max_age, stale = EDGE_CACHE_LIFETIMES.get(body.get('confidence'), EDGE_CACHE_LIFETIMES['low'])
+    response.headers['Cache-Control'] = (
+        f'public, max-age={max_age}, s-maxage={max_age}, stale-while-revalidate={stale}')
+    response.set_etag(response_etag(body))
+    return response.make_conditional(request)
+
+# Lookups from /api/find/batch share this pool, so the number of batch lookups
+# running at once is capped for the whole process regardless of how many
+# batches are in flight; interactive requests never wait on it
+BATCH_MAX_CONCURRENCY = max(1, int(os.getenv('BATCH_MAX_CONCURRENCY', '4')))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix='batch-lookup')
+
+# Lookup jobs (/api/jobs) are kept in SQLite so every process on the machine shares
+# one queue; JOB_WORKERS threads in this process run them (0 = only enqueue here).
+# Serverless instances are frozen between requests, so by default they run no
+# workers and a GET /api/jobs/<id>?wait=... runs a still queued job itself
+# (JOB_RUN_INLINE). Elsewhere JOB_WORKERS=0 means jobs.py workers drain the queue.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '0' if STARTUP_MODE == 'serverless' else '4'))
+JOB_RUN_INLINE = (JOB_WORKERS <= 0 and
+                  os.getenv('JOB_RUN_INLINE', '1' if STARTUP_MODE == 'serverless' else '0') == '1')
+job_store = None
+job_workers = None
+
+def get_job_store():
+    """The shared job store, opened on first use"""
+    global job_store
+    if job_store is None:
+        with _build_lock:
+            if job_store is None:
+                job_store = JobStore.from_env()
+    return job_store
+
+def get_job_workers():
+    """This process's job worker pool (not started until a job is queued here), built on first use"""
+    global job_workers
+    if job_workers is None:
+        with _build_lock:
+            if job_workers is None:
+                job_workers = JobWorkerPool(get_job_store(), lookup, workers=JOB_WORKERS)
+    return job_workers
+# Longest a GET /api/jobs/<id>?wait=... request is held open
+JOB_MAX_WAIT_SECONDS = float(os.getenv('JOB_MAX_WAIT_SECONDS', '25'))
+
+if STARTUP_MODE != 'serverless':
+    get_finder()
+    get_async_finder()
+    get_result_cache()
+    get_job_workers()
+
+# TLS_PREWARM=1 opens connections to Google, Instagram and Facebook in the background
+# at start-up, so the first lookup doesn't wait for the handshakes (sync engine)
+if os.getenv('TLS_PREWARM', '0') == '1':
+    get_finder().session.prewarm()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/api/health')
+def health():
+    """Custom Search quota state and cache statistics for monitoring"""
+    finder = get_finder()
+    return jsonify({
+        'status': 'ok',
+        'custom_search': finder.cse_keys.health(),
+        'negative_cache': finder.negative_cache.stats(),
+        'handle_index': handle_index.stats() if handle_index is not None else None,
+        'jobs': get_job_store().counts()
+    })
+
+@app.route('/api/probe-stats')
+def probe_stats_report():
+    """How often each handle pattern verified, per platform and country, as used to order direct probes"""
+    finder = get_finder()
+    if finder.probe_stats is None:
+        return jsonify({'enabled': False, 'platforms': {}})
+    return jsonify({
+        'enabled': True,
+        'min_samples': finder.probe_stats.min_samples,
+        'coverage': finder.probe_stats.coverage,
+        'platforms': finder.probe_stats.stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Lookup latency, outbound request, cache and fallback metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/search', methods=['POST'])
 def search():
     data = request.json
     business_name = data.get('business_name', '').strip()
     country = data.get('country', '').strip()
+    cache_mode = data.get('cache') or request.args.get('cache') or 'use'
+    timeout_ms = data.get('timeout_ms') or request.args.get('timeout_ms')
     
     if not business_name:
         return jsonify({'error': 'Business name is required'}), 400
@@ -886,55 +345,233 @@ def search():
     if not country:
         return jsonify({'error': 'Country is required'}), 400
     
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': 'cache parameter must be one of: bypass, refresh'}), 400
+    
+    timeout = parse_timeout_ms(timeout_ms)
+    if timeout is False:
+        return jsonify({'error': 'timeout_ms must be a positive number of milliseconds'}), 400
+    
     try:
-        results = finder.find_social_links(business_name, country)
+        results = lookup(business_name, country, cache_mode, timeout)
         return jsonify(results)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_timeout_ms(value):
+    """The timeout_ms request parameter in seconds: None when absent, False when invalid"""
+    if value in (None, ''):
+        return None
+    try:
+        timeout_ms = float(value)
+    except (TypeError, ValueError):
+        return False
+    return timeout_ms / 1000 if timeout_ms > 0 else False
+
+def find_params():
+    """
+    Read business_name, country, cache, timings and timeout_ms from the query string (GET/HEAD),
+    a JSON body or form data (POST). Returns (business_name, country, cache_mode, timings, timeout_ms).
+    """
+    # Support both GET (and HEAD, which Flask routes to GET views) and POST
+    if request.method in ('GET', 'HEAD'):
+        values = request.args
+    elif request.is_json:
+        values = request.json or {}
+    else:
+        values = request.form
+    
+    business_name = str(values.get('business_name') or '').strip()
+    country = str(values.get('country') or '').strip()
+    cache_mode = values.get('cache') or request.args.get('cache') or 'use'
+    timings = values.get('timings') or request.args.get('timings')
+    timeout_ms = values.get('timeout_ms') or request.args.get('timeout_ms')
+    return business_name, country, cache_mode, str(timings).lower() in ('1', 'true', 'yes'), timeout_ms
+
 @app.route('/api/find', methods=['GET', 'POST'])
 def find_links():
     """
     API endpoint to find social media links for a business
     GET or POST: ?business_name=NAME&country=COUNTRY
     POST JSON: {"business_name": "NAME", "country": "COUNTRY"}
-    Country is optional
+    Country is optional; cache=bypass|refresh controls the result cache;
+    timings=1 adds per-stage timings to the response; timeout_ms=N returns
+    whatever was verified after N milliseconds. GET responses carry an ETag and
+    a Cache-Control lifetime that depends on the confidence (see cacheable_response)
     """
-    # Support both GET and POST
-    if request.method == 'GET':
-        business_name = request.args.get('business_name', '').strip()
-        country = request.args.get('country', '').strip() or None
-    else:  # POST
-        if request.is_json:
-            data = request.json
-            business_name = data.get('business_name', '').strip()
-            country = data.get('country', '').strip() or None
-        else:
-            business_name = request.form.get('business_name', '').strip()
-            country = request.form.get('country', '').strip() or None
+    business_name, country, cache_mode, timings, timeout_ms = find_params()
     
     if not business_name:
         return jsonify({'error': 'business_name parameter is required'}), 400
     
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': 'cache parameter must be one of: bypass, refresh'}), 400
+    
+    timeout = parse_timeout_ms(timeout_ms)
+    if timeout is False:
+        return jsonify({'error': 'timeout_ms must be a positive number of milliseconds'}), 400
+    
     try:
-        # Use empty string if country is None for backward compatibility
-        country = country or ''
-        results = finder.find_social_links(business_name, country)
+        results = lookup(business_name, country, cache_mode, timeout)
         
         # Return clean response with just the links
-        response = {
-            'business_name': business_name,
-            'country': country if country else None,
-            'instagram': results.get('instagram'),
-            'facebook': results.get('facebook'),
-            'website': results.get('website'),
-            'confidence': results.get('confidence'),
-            'sources': results.get('sources', [])
-        }
+        response = format_find_response(business_name, country, results, include_timings=timings)
         
-        return jsonify(response)
+        if request.method == 'POST':
+            return jsonify(response)
+        # Bypassed or refreshed lookups, timings and partial results must not be replayed by a cache
+        cacheable = cache_mode == 'use' and not timings and not response['partial']
+        return cacheable_response(response, cacheable)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/find/batch', methods=['POST'])
+def find_links_batch():
+    """
+    Batch version of /api/find
+    POST a JSON array (with or without a JSON content type) or NDJSON lines of
+    {"business_name": "NAME", "country": "COUNTRY"}
+    Streams one NDJSON line per business as each lookup finishes (completion order),
+    with an `index` field giving the entry's position in the input
+    """
+    cache_mode = request.args.get('cache') or 'use'
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': 'cache parameter must be one of: bypass, refresh'}), 400
+    
+    if request.is_json:
+        # silent: malformed JSON gives None instead of Flask's HTML 400 page
+        entries = request.get_json(silent=True)
+        if entries is None:
+            return jsonify({'error': 'Invalid JSON: request body could not be parsed'}), 400
+    else:
+        try:
+            body = request.get_data(as_text=True)
+            if body.lstrip().startswith('['):
+                # A JSON array sent without the JSON content type (NDJSON lines are objects)
+                entries = json.loads(body)
+            else:
+                entries = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except ValueError as e:
+            return jsonify({'error': f'Invalid JSON: {e}'}), 400
+    
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Request body must be a JSON array or NDJSON lines'}), 400
+    
+    def generate():
+        pending = {}
+        queue = iter(enumerate(entries))
+        
+        def submit_next():
+            # Returns an error line for invalid entries instead of submitting them
+            index, entry = next(queue)
+            if not isinstance(entry, dict) or not str(entry.get('business_name') or '').strip():
+                return {'index': index, 'error': 'business_name is required'}
+            business_name = str(entry['business_name']).strip()
+            country = str(entry.get('country') or '').strip()
+            future = batch_executor.submit(lookup, business_name, country, cache_mode)
+            pending[future] = (index, business_name, country)
+            return None
+        
+        try:
+            exhausted = False
+            while True:
+                # Keep at most BATCH_MAX_CONCURRENCY lookups of this batch queued on the pool
+                while not exhausted and len(pending) < BATCH_MAX_CONCURRENCY:
+                    try:
+                        error_line = submit_next()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if error_line:
+                        yield json.dumps(error_line) + '\n'
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, business_name, country = pending.pop(future)
+                    try:
+                        line = {'index': index, **format_find_response(business_name, country, future.result())}
+                    except Exception as e:
+                        line = {'index': index, 'business_name': business_name, 'error': str(e)}
+                    yield json.dumps(line) + '\n'
+        finally:
+            # Client went away or the batch finished - drop anything still queued
+            for future in pending:
+                future.cancel()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def format_job(job, include_timings=False):
+    """Build the /api/jobs response body for a stored job"""
+    body = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'business_name': job['business_name'],
+        'country': job['country'] or None,
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+    if job['result'] is not None:
+        body['result'] = format_find_response(job['business_name'], job['country'], job['result'], include_timings)
+    if job['error']:
+        body['error'] = job['error']
+    return body
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a lookup and return its job ID at once (202 Accepted)
+    Takes the same parameters as /api/find; poll GET /api/jobs/<job_id> for the result
+    """
+    business_name, country, cache_mode, _, _ = find_params()
+    
+    if not business_name:
+        return jsonify({'error': 'business_name parameter is required'}), 400
+    
+    if cache_mode not in CACHE_MODES:
+        return jsonify({'error': 'cache parameter must be one of: bypass, refresh'}), 400
+    
+    try:
+        job_id = get_job_store().create(business_name, country, cache_mode)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    job_workers = get_job_workers()
+    job_workers.start()
+    job_workers.notify()
+    status_url = f'/api/jobs/{job_id}'
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url}), 202, {'Location': status_url}
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    State of a job, with its result once done
+    wait=SECONDS holds the request until the job finishes or the time is up (at most JOB_MAX_WAIT_SECONDS);
+    with JOB_RUN_INLINE, a job still queued is run by this request within that time
+    """
+    try:
+        wait_seconds = min(float(request.args.get('wait') or 0), JOB_MAX_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    timings = str(request.args.get('timings')).lower() in ('1', 'true', 'yes')
+    
+    try:
+        job_store = get_job_store()
+        job = job_store.get(job_id)
+        if job is not None and wait_seconds > 0 and job['status'] not in FINISHED:
+            if JOB_RUN_INLINE and job['status'] == QUEUED and get_job_workers().run_now(job_id, timeout=wait_seconds):
+                job = job_store.get(job_id)
+            else:
+                job = job_store.wait(job_id, wait_seconds)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(format_job(job, timings))
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
@@ -0,0 +1,145 @@
+"""
+Cold start benchmark for the serverless entry point (api/index.py).
+
+    python benchmarks/bench_cold_start.py [--runs 10] [--index-entries 50000] [--output cold_start.json]
+
+Each run starts a fresh Python process, as a serverless platform does for a
+cold instance, and measures:
+
+- import_ms: importing api/index.py (Flask, the app module and everything
+  built at import time)
+- first_response_ms: the first request after that, served through the WSGI
+  handler. It is a lookup answered from a seeded result cache (or, with
+  --route indexed, from the local handle index), so no network is involved
+- process_ms: from spawning the process until the first response, including
+  interpreter start-up
+
+Stores (result cache, handle index, probe stats, jobs) live in a temporary
+directory. --index-entries fills the handle index first, to show what its
+size costs at start-up. Pass --env STARTUP_MODE=eager to compare with the
+mode used when app.py runs as a long-lived server.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from handle_index import HandleIndex  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+BUSINESS = ("McDonald's", 'Kuwait')
+RESULT = {
+    'instagram': 'https://www.instagram.com/mcdonaldskuwait/',
+    'facebook': 'https://www.facebook.com/mcdonaldskuwait/',
+    'website': 'https://www.mcdonalds.com.kw/',
+    'confidence': 'high',
+    'sources': ['Google Custom Search API'],
+}
+
+# Runs in the fresh process; prints one JSON line of timings
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from api.index import handler
+imported = time.perf_counter()
+from werkzeug.test import Client
+response = Client(handler).get('/api/find', query_string={{'business_name': {name!r}, 'country': {country!r}}})
+assert response.status_code == 200, response.status_code
+assert response.get_json()['instagram'], response.get_json()
+done = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'first_response_ms': (done - imported) * 1000}}))
+"""
+
+
+def seed(directory, route, index_entries):
+    """Create the stores a run reads and return the environment pointing at them"""
+    env = {
+        'RESULT_CACHE_PATH': os.path.join(directory, 'results.sqlite3'),
+        'HANDLE_INDEX_PATH': os.path.join(directory, 'handles.sqlite3'),
+        'PROBE_STATS_PATH': os.path.join(directory, 'probe_stats.sqlite3'),
+        'JOB_STORE_PATH': os.path.join(directory, 'jobs.sqlite3'),
+    }
+    index = HandleIndex(env['HANDLE_INDEX_PATH'])
+    items = [index._entry(f'Business {i:06d}', 'Kuwait', RESULT, 'import') for i in range(index_entries)]
+    if route == 'indexed':
+        items.append(index._entry(*BUSINESS, RESULT, 'import'))
+    else:
+        ResultCache(env['RESULT_CACHE_PATH']).set(*BUSINESS, RESULT)
+    for start in range(0, len(items), 1000):
+        index._store(items[start:start + 1000])
+    return env
+
+
+def run_once(env):
+    code = CHILD.format(root=ROOT, name=BUSINESS[0], country=BUSINESS[1])
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    finished = time.perf_counter()
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process_ms'] = (finished - started) * 1000
+    return timings
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'min_ms': round(ordered[0], 1),
+        'median_ms': round(statistics.median(ordered), 1),
+        'p90_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time and time to first response of a cold process')
+    parser.add_argument('--runs', type=int, default=10, help='fresh processes to start (default: 10)')
+    parser.add_argument('--route', choices=('cached', 'indexed'), default='cached',
+                        help='answer the first request from the result cache or the handle index (default: cached)')
+    parser.add_argument('--index-entries', type=int, default=0, help='extra entries to put in the handle index')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='extra environment for the runs, e.g. STARTUP_MODE=eager (repeatable)')
+    parser.add_argument('--output', default=os.path.join(HERE, 'cold_start.json'),
+                        help='where to write the results as JSON (default: benchmarks/cold_start.json)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DNS_PRERESOLVE='0', **seed(directory, args.route, args.index_entries))
+        for pair in args.env:
+            name, _, value = pair.partition('=')
+            env[name] = value
+        run_once(env)  # Leaves bytecode caches written, as they are in a deployed package
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    results = {key: summarize([run[key] for run in runs]) for key in ('import_ms', 'first_response_ms', 'process_ms')}
+    for key, summary in results.items():
+        print(f"{key:<20} min {summary['min_ms']:>8.1f}  median {summary['median_ms']:>8.1f}  p90 {summary['p90_ms']:>8.1f}")
+
+    report = {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'route': args.route,
+            'index_entries': args.index_entries,
+            'env': args.env,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Offline microbenchmarks for the CPU-bound hot paths of a lookup.
+
+    python benchmarks/bench_components.py [--output results.json] [--compare baseline.json]
+
+Every case runs against the stored pages in benchmarks/fixtures/ (Google
+results, Instagram/Facebook profiles, a business home page), so no network
+access is needed. Results are written as JSON. To catch regressions before
+deploying, save a run from a known-good commit and compare later runs with it:
+
+    python benchmarks/bench_components.py --output baseline.json
+    python benchmarks/bench_components.py --compare baseline.json
+
+--compare exits with status 1 when a case got slower than --threshold
+times its baseline.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, 'fixtures')
+sys.path.insert(0, os.path.dirname(HERE))
+
+# Keep the benchmark away from the on-disk result cache
+os.environ.setdefault('RESULT_CACHE_PATH', '')
+
+from social_finder import SocialMediaFinder, FetchedPage  # noqa: E402
+from extraction import extract_links  # noqa: E402
+from negative_cache import NegativeCache  # noqa: E402
+from normalization import NamePlan  # noqa: E402
+from scoring import candidate_score, name_profile  # noqa: E402
+
+BUSINESS_NAMES = [
+    ("McDonald's", 'Kuwait'),
+    ('MB Vision', 'Kuwait'),
+    ('Caribou Coffee', 'United Arab Emirates'),
+    ('The Cheesecake Factory', 'Saudi Arabia'),
+    ('Al Mulla Exchange & Co.', None),
+    ('Jashanmal', 'Bahrain'),
+]
+COUNTRIES = ['Kuwait', 'kuwait', 'UAE', 'United Arab Emirates', 'Saudi Arabia', 'Qatar',
+             'United States', 'Germany', 'South Africa', 'Atlantis', '']
+TITLES = {
+    'short': "McDonald's Kuwait",
+    'medium': "McDonald's Kuwait (@mcdonaldskw) • Instagram photos and videos",
+    'long': ("McDonald's Kuwait. 1,203,412 likes · 2,101 talking about this · 14,220 were here. "
+             "Welcome to the official McDonald's Kuwait page, home of the Big Mac, McArabia "
+             "and the best fries in town. Order on the app or visit us at any branch."),
+}
+HREF_RE = re.compile(r'href="(?:/url\?q=)?(https?://[^"&]+)')
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def build_cases():
+    """{case name: zero-argument callable}, each exercising one hot path on fixture data"""
+    finder = SocialMediaFinder(negative_cache=NegativeCache(), cse_keys=[])
+    google_pages = {os.path.basename(path)[len('google_results_'):-len('.html')]: _read(os.path.basename(path))
+                    for path in sorted(glob.glob(os.path.join(FIXTURES, 'google_results_*.html')))}
+    instagram_page = _read('instagram_profile_mcdonaldskw.html')
+    facebook_page = _read('facebook_profile_mcdonaldskuwait.html')
+    home_page = _read('home_mcdonalds.html')
+
+    links = []
+    for page in list(google_pages.values()) + [home_page]:
+        links.extend(HREF_RE.findall(page))
+    instagram_links = [link for link in links if 'instagram.com' in link] or ['https://www.instagram.com/mcdonaldskw/?hl=en']
+    facebook_links = [link for link in links if 'facebook.com' in link] or ['https://www.facebook.com/McDonaldsKuwait/']
+
+    cases = {
+        'generate_username_variations': lambda: [finder._generate_username_variations(name, country)
+                                                 for name, country in BUSINESS_NAMES],
+        'get_country_code': lambda: [finder._get_country_code(country) for country in COUNTRIES],
+        # Building plans without the memo, i.e. the first lookup of each business
+        'name_plan[uncached]': lambda: [NamePlan(name, country) for name, country in BUSINESS_NAMES],
+        'is_likely_website': lambda: [finder._is_likely_website(link, "McDonald's") for link in links],
+        'normalize_instagram_url': lambda: [finder._normalize_instagram_url(link) for link in instagram_links],
+        'normalize_facebook_url': lambda: [finder._normalize_facebook_url(link) for link in facebook_links],
+    }
+
+    pages = dict(google_pages)
+    pages['instagram_profile'] = instagram_page
+    pages['facebook_profile'] = facebook_page
+    pages['home'] = home_page
+    for label, page in pages.items():
+        cases[f'extract_instagram_from_text[{label}]'] = lambda page=page: finder._extract_instagram_from_text(page)
+        cases[f'extract_facebook_from_text[{label}]'] = lambda page=page: finder._extract_facebook_from_text(page)
+        cases[f'extract_website_from_text[{label}]'] = (
+            lambda page=page: finder._extract_website_from_text(page, "McDonald's"))
+    for label, page in google_pages.items():
+        cases[f'extract_links[{label}]'] = lambda page=page: extract_links(page, "McDonald's")
+
+    for label, title in TITLES.items():
+        cases[f'similarity[{label} title]'] = lambda title=title: finder._similarity("McDonald's", title)
+        cases[f'candidate_score[{label} title]'] = (
+            lambda title=title: candidate_score(name_profile("McDonald's"), 'https://www.instagram.com/mcdonaldskw/', title))
+
+    instagram_response = FetchedPage(200, 'https://www.instagram.com/mcdonaldskw/', instagram_page)
+    facebook_response = FetchedPage(200, 'https://www.facebook.com/McDonaldsKuwait/', facebook_page)
+    home_response = FetchedPage(200, 'https://www.mcdonalds.com.kw', home_page)
+    cases['check_instagram_response'] = lambda: finder._check_instagram_response(
+        instagram_response.url, instagram_response, "McDonald's")
+    cases['check_facebook_response'] = lambda: finder._check_facebook_response(facebook_response.url, facebook_response)
+    cases['check_website_response'] = lambda: finder._check_website_response(
+        home_response.url, home_response, "McDonald's")
+    return cases
+
+
+def run_case(func, repeat):
+    """Time func with timeit and return per-call {'best_us', 'median_us', 'loops'}"""
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    samples = [total / loops * 1e6 for total in timer.repeat(repeat=repeat, number=loops)]
+    return {'best_us': round(min(samples), 3), 'median_us': round(statistics.median(samples), 3), 'loops': loops}
+
+
+def compare(results, baseline, threshold, partial=False):
+    """
+    Print current against baseline timings and return the names of cases that regressed.
+    partial: this run was filtered, so baseline cases it skipped aren't reported as missing
+    """
+    regressions = []
+    print(f"\n{'case':<52} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<52} {'-':>12} {current['best_us']:>10.1f}us {'new':>7}")
+            continue
+        ratio = current['best_us'] / before['best_us'] if before['best_us'] else float('inf')
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<52} {before['best_us']:>10.1f}us {current['best_us']:>10.1f}us {ratio:>6.2f}x{flag}")
+    for name in baseline:
+        if name not in results and not partial:
+            print(f"{name:<52} {'(missing from this run)':>33}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline microbenchmarks for the lookup hot paths')
+    parser.add_argument('--output', default=os.path.join(HERE, 'results.json'),
+                        help='where to write this run as JSON (default: benchmarks/results.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio that counts as a regression with --compare (default: 1.25)')
+    parser.add_argument('--repeat', type=int, default=5, help='timing samples per case (default: 5)')
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this text')
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_cases().items():
+        if args.filter not in name:
+            continue
+        results[name] = run_case(func, args.repeat)
+        print(f"{name:<52} best {results[name]['best_us']:>10.1f}us  median {results[name]['median_us']:>10.1f}us")
+
+    report = {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, partial=bool(args.filter))
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold}x baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Microbenchmark: single-pass extraction (extraction.extract_links) against the
+previous per-platform regex functions on saved Google result pages.
+
+    python benchmarks/bench_extraction.py [--repeat N] [fixture.html ...]
+
+For every page it times the three legacy extractions plus the legacy
+_is_likely_website check on each link, and one extract_links call, and
+prints the results both approaches pick.
+"""
+import argparse
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from extraction import extract_links, is_likely_website  # noqa: E402
+from legacy_extraction import LegacyExtractor  # noqa: E402
+
+HREF_RE = re.compile(r'href="(?:/url\?q=)?(https?://[^"&]+)')
+
+
+def _time(func, repeat):
+    """Best and median of repeat runs, in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def bench_page(path, repeat):
+    with open(path, encoding='utf-8') as f:
+        page = f.read()
+    legacy = LegacyExtractor()
+    business_name = os.path.splitext(os.path.basename(path))[0].split('_')[-1]
+    links = HREF_RE.findall(page)
+
+    def run_legacy():
+        return (legacy._extract_instagram_from_text(page),
+                legacy._extract_facebook_from_text(page),
+                legacy._extract_website_from_text(page, business_name))
+
+    def run_single_pass():
+        found = extract_links(page, business_name)
+        return tuple(found[platform][0] if found[platform] else None
+                     for platform in ('instagram', 'facebook', 'website'))
+
+    rows = [
+        ('extract (legacy, 3 scans)', _time(run_legacy, repeat), run_legacy()),
+        ('extract (single pass)', _time(run_single_pass, repeat), run_single_pass()),
+        (f'is_likely_website x{len(links)} (legacy)',
+         _time(lambda: [legacy._is_likely_website(link, business_name) for link in links], repeat), None),
+        (f'is_likely_website x{len(links)} (host set)',
+         _time(lambda: [is_likely_website(link) for link in links], repeat), None),
+    ]
+
+    print(f"\n{os.path.basename(path)} ({len(page) // 1024} KB)")
+    for label, (best, median), picked in rows:
+        print(f"  {label:<36} best {best:8.2f} ms   median {median:8.2f} ms")
+        if picked:
+            print(f"  {'':<36} -> {picked}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pages', nargs='*', help='HTML pages (default: benchmarks/fixtures/google_results_*.html)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(glob.glob(os.path.join(HERE, 'fixtures', 'google_results_*.html')))
+    for path in pages:
+        bench_page(path, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+The link extraction functions as they were before extraction.py, kept as the
+baseline for bench_extraction.py. Not used by the app.
+"""
+import re
+
+
+class LegacyExtractor:
+    def _extract_instagram_from_text(self, text):
+        """
+        Extract Instagram URL from text content
+        """
+        patterns = [
+            r'https?://(?:www\.)?instagram\.com/([a-zA-Z0-9_.]+)/?',
+            r'instagram\.com/([a-zA-Z0-9_.]+)/?',
+        ]
+
+        for pattern in patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                username = matches[0].split('/')[0].split('?')[0].split('#')[0]
+                if username and len(username) > 1:
+                    return self._normalize_instagram_url(f"https://www.instagram.com/{username}/")
+
+        return None
+
+    def _extract_facebook_from_text(self, text):
+        """
+        Extract Facebook URL from text content
+        """
+        patterns = [
+            r'https?://(?:www\.)?facebook\.com/([a-zA-Z0-9_.]+)/?',
+            r'facebook\.com/([a-zA-Z0-9_.]+)/?',
+        ]
+
+        for pattern in patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                page = matches[0].split('/')[0].split('?')[0].split('#')[0]
+                if page and len(page) > 1 and page not in ['pages', 'profile', 'people']:
+                    return self._normalize_facebook_url(f"https://www.facebook.com/{page}/")
+
+        return None
+
+    def _normalize_instagram_url(self, url):
+        """Normalize Instagram URL format"""
+        match = re.search(r'instagram\.com/([a-zA-Z0-9_.]+)', url, re.IGNORECASE)
+        if match:
+            username = match.group(1).split('/')[0].split('?')[0]
+            return f"https://www.instagram.com/{username}/"
+        return url
+
+    def _normalize_facebook_url(self, url):
+        """Normalize Facebook URL format"""
+        match = re.search(r'facebook\.com/([a-zA-Z0-9_.]+)', url, re.IGNORECASE)
+        if match:
+            page = match.group(1).split('/')[0].split('?')[0]
+            return f"https://www.facebook.com/{page}/"
+        return url
+
+    def _is_likely_website(self, url, business_name):
+        """Check if a URL is likely an official business website"""
+        if not url:
+            return False
+
+        url_lower = url.lower()
+
+        # Skip social media and common non-business sites
+        skip_domains = [
+            'facebook.com', 'instagram.com', 'twitter.com', 'linkedin.com',
+            'youtube.com', 'tiktok.com', 'pinterest.com', 'snapchat.com',
+            'google.com', 'maps.google.com', 'support.google.com', 'google.com/maps', 'google.com/search',
+            'yelp.com', 'tripadvisor.com', 'foursquare.com', 'zomato.com', 'opentable.com',
+            'wikipedia.org', 'maps.apple.com', 'bing.com', 'yahoo.com', 'duckduckgo.com',
+            'search.yahoo.com', 'search.bing.com'
+        ]
+
+        for domain in skip_domains:
+            if domain in url_lower:
+                return False
+
+        # Must be http/https
+        if not url_lower.startswith(('http://', 'https://')):
+            return False
+
+        # Prefer .com, .net, .org, country-specific TLDs
+        valid_tlds = ['.com', '.net', '.org', '.co', '.io', '.me', '.info', '.biz',
+                      '.ae', '.kw', '.sa', '.qa', '.bh', '.om', '.jo', '.lb', '.eg']
+        has_valid_tld = any(tld in url_lower for tld in valid_tlds)
+
+        return has_valid_tld
+
+    def _extract_website_from_text(self, text, business_name):
+        """Extract website URL from text content"""
+        # Look for common website patterns - improved regex
+        patterns = [
+            r'https?://(?:www\.)?([a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.(?:com|net|org|co|io|me|info|biz|ae|kw|sa|qa|bh|om|jo|lb|eg)[^/\s"\'<>]*)',
+            r'(?:website|site|visit|www)\.([a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9]*\.(?:com|net|org|co|io|me|info|biz|ae|kw|sa|qa|bh|om|jo|lb|eg))',
+            r'<a[^>]*href=["\'](https?://[^"\']+)["\']',
+        ]
+
+        found_urls = []
+
+        for pattern in patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            for match in matches:
+                if isinstance(match, tuple):
+                    domain = match[0] if match[0] else (match[1] if len(match) > 1 else None)
+                else:
+                    domain = match
+
+                if domain:
+                    if domain.startswith('http'):
+                        url = domain
+                    else:
+                        url = f"https://{domain}"
+
+                    # Clean up URL
+                    url = url.split('"')[0].split("'")[0].split(' ')[0].split('\n')[0]
+
+                    if self._is_likely_website(url, business_name) and url not in found_urls:
+                        found_urls.append(url)
+
+        # Return the first valid website found
+        return found_urls[0] if found_urls else None
+
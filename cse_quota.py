@@ -0,0 +1,157 @@
+"""
+Process-wide quota tracking for the Google Custom Search API.
+
+Holds a pool of API key / search engine ID pairs. When a key runs out of
+daily quota (HTTP 403) it is skipped until Google resets quotas at midnight
+Pacific time; a rate-limited key (HTTP 429) is skipped for a short cooldown.
+Lookups rotate to the next key that still has quota, and skip Custom Search
+entirely while every key is exhausted.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo('America/Los_Angeles')
+except Exception:
+    _PACIFIC = timezone(timedelta(hours=-8))  # No tz database available, ignore daylight saving
+
+QUOTA_EXCEEDED = 'quota_exceeded'
+RATE_LIMITED = 'rate_limited'
+
+
+def _next_quota_reset(now=None):
+    """Unix time of the next midnight Pacific time, when Custom Search quotas reset"""
+    current = datetime.fromtimestamp(now if now is not None else time.time(), _PACIFIC)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+def _quota_day(now=None):
+    return datetime.fromtimestamp(now if now is not None else time.time(), _PACIFIC).date().isoformat()
+
+
+def _key_id(index, api_key):
+    """Identify a key in logs and health output without exposing it"""
+    return f"key{index + 1}-{api_key[-4:]}"
+
+
+class CSEKeyPool:
+    def __init__(self, credentials, daily_quota=100, rate_limit_cooldown=60):
+        """credentials: list of (api_key, cse_id) pairs, in order of preference"""
+        self.daily_quota = daily_quota
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self._keys = []
+        for index, (api_key, cse_id) in enumerate(credentials):
+            self._keys.append({
+                'id': _key_id(index, api_key),
+                'api_key': api_key,
+                'cse_id': cse_id,
+                'blocked_until': 0.0,
+                'blocked_reason': None,
+                'used': 0,
+                'day': _quota_day(),
+            })
+        self._current = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, google_api_key=None, google_cse_id=None):
+        """
+        Build the pool from the given key pair plus GOOGLE_API_KEYS, a comma-separated
+        list of api_key:cse_id pairs (a pair without :cse_id uses GOOGLE_CSE_ID)
+        """
+        default_cse_id = google_cse_id or os.getenv('GOOGLE_CSE_ID')
+        credentials = []
+        if google_api_key and default_cse_id:
+            credentials.append((google_api_key, default_cse_id))
+        for entry in os.getenv('GOOGLE_API_KEYS', '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            api_key, _, cse_id = entry.partition(':')
+            cse_id = cse_id or default_cse_id
+            if cse_id and (api_key, cse_id) not in credentials:
+                credentials.append((api_key, cse_id))
+        return cls(
+            credentials,
+            daily_quota=int(os.getenv('CSE_DAILY_QUOTA', '100')),
+            rate_limit_cooldown=int(os.getenv('CSE_RATE_LIMIT_COOLDOWN', '60'))
+        )
+
+    def __bool__(self):
+        return bool(self._keys)
+
+    def _refresh(self, key, now):
+        if key['blocked_until'] and key['blocked_until'] <= now:
+            key['blocked_until'] = 0.0
+            key['blocked_reason'] = None
+        day = _quota_day(now)
+        if key['day'] != day:
+            key['day'] = day
+            key['used'] = 0
+
+    def acquire(self):
+        """
+        Return {'id', 'api_key', 'cse_id'} for the current key if it has quota,
+        else for the next one that does, or None while every key is exhausted
+        """
+        now = time.time()
+        with self._lock:
+            for offset in range(len(self._keys)):
+                index = (self._current + offset) % len(self._keys)
+                key = self._keys[index]
+                self._refresh(key, now)
+                if not key['blocked_until']:
+                    self._current = index
+                    return {'id': key['id'], 'api_key': key['api_key'], 'cse_id': key['cse_id']}
+        return None
+
+    def record_use(self, key_id):
+        with self._lock:
+            for key in self._keys:
+                if key['id'] == key_id:
+                    key['used'] += 1
+
+    def record_exhausted(self, key_id, reason):
+        """Take a key out of rotation until its quota resets (or its rate limit cools down)"""
+        now = time.time()
+        if reason == RATE_LIMITED:
+            blocked_until = now + self.rate_limit_cooldown
+        else:
+            blocked_until = _next_quota_reset(now)
+        with self._lock:
+            for key in self._keys:
+                if key['id'] == key_id:
+                    key['blocked_until'] = blocked_until
+                    key['blocked_reason'] = reason
+                    if reason == QUOTA_EXCEEDED:
+                        key['used'] = max(key['used'], self.daily_quota)
+        print(f"Google API key {key_id} {reason.replace('_', ' ')}, skipping it until "
+              f"{datetime.fromtimestamp(blocked_until, timezone.utc).isoformat()}")
+
+    def health(self):
+        """State of every key for monitoring: availability, reset time and remaining-quota estimate"""
+        now = time.time()
+        keys = []
+        with self._lock:
+            for key in self._keys:
+                self._refresh(key, now)
+                keys.append({
+                    'id': key['id'],
+                    'available': not key['blocked_until'],
+                    'blocked_reason': key['blocked_reason'],
+                    'reset_at': (datetime.fromtimestamp(key['blocked_until'], timezone.utc).isoformat()
+                                 if key['blocked_until'] else None),
+                    'used_today': key['used'],
+                    'remaining_estimate': 0 if key['blocked_reason'] == QUOTA_EXCEEDED
+                                          else max(0, self.daily_quota - key['used']),
+                })
+        return {
+            'configured': bool(keys),
+            'available': any(key['available'] for key in keys),
+            'remaining_estimate': sum(key['remaining_estimate'] for key in keys),
+            'keys': keys,
+        }
@@ -0,0 +1,123 @@
+"""
+Host name pre-resolution for guessed website domains.
+
+Most domains guessed for a business do not exist. Resolving all of them at
+once, before any HTTP request is made, lets the website search skip the dead
+guesses and probe only the hosts that exist. Answers are cached: hosts that
+resolve for DNS_CACHE_TTL seconds, hosts that definitely don't (NXDOMAIN, no
+address) for DNS_NEGATIVE_TTL seconds. Temporary failures and lookups that
+don't answer within the timeout are reported as unknown and not cached, so
+those hosts are still probed.
+"""
+import os
+import socket
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# getaddrinfo errors meaning the name has no address (as opposed to a failed lookup)
+_NO_ADDRESS_ERRORS = {getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA') if hasattr(socket, name)}
+
+
+class DNSCache:
+    def __init__(self, ttl=300, negative_ttl=1800, timeout=2.0, workers=16, max_entries=50000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout      # Seconds resolve_all waits before treating unanswered hosts as unknown
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # host -> (resolves, expires_at), oldest first
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dns')
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a cache from DNS_CACHE_TTL, DNS_NEGATIVE_TTL and DNS_TIMEOUT, or return None when
+        pre-resolution is off (DNS_PRERESOLVE=0) or requests go through a proxy, which resolves
+        names itself
+        """
+        if os.getenv('DNS_PRERESOLVE', '1') == '0' or urllib.request.getproxies().get('https'):
+            return None
+        return cls(
+            ttl=int(os.getenv('DNS_CACHE_TTL', '300')),
+            negative_ttl=int(os.getenv('DNS_NEGATIVE_TTL', '1800')),
+            timeout=float(os.getenv('DNS_TIMEOUT', '2'))
+        )
+
+    def get(self, host):
+        """Cached answer for host: True (resolves), False (doesn't) or None (not cached)"""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[host]
+                return None
+            return entry[0]
+
+    def _store(self, host, resolves):
+        ttl = self.ttl if resolves else self.negative_ttl
+        with self._lock:
+            self._entries.pop(host, None)
+            self._entries[host] = (resolves, time.monotonic() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _resolve(self, host):
+        try:
+            socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in _NO_ADDRESS_ERRORS:
+                self._store(host, False)
+                return False
+            return None  # Temporary failure: let the probe find out
+        except (OSError, UnicodeError):
+            return None
+        self._store(host, True)
+        return True
+
+    def _start(self, hosts):
+        """Cached answers for hosts, and futures resolving the rest"""
+        answers = {}
+        futures = {}
+        for host in dict.fromkeys(hosts):
+            cached = self.get(host)
+            if cached is not None:
+                answers[host] = cached
+                self.hits += 1
+            else:
+                futures[self._executor.submit(self._resolve, host)] = host
+                self.misses += 1
+        return answers, futures
+
+    def resolve_all(self, hosts):
+        """
+        Resolve hosts concurrently and return {host: True, False or None (unknown)}.
+        Hosts still resolving after the timeout are unknown; their answers are cached when they arrive.
+        """
+        answers, futures = self._start(hosts)
+        if futures:
+            done, _ = wait(futures, timeout=self.timeout)
+            for future, host in futures.items():
+                answers[host] = future.result() if future in done else None
+        return answers
+
+    async def resolve_all_async(self, hosts):
+        """resolve_all for coroutines: waits on the event loop instead of blocking it"""
+        import asyncio
+        answers, futures = self._start(hosts)
+        if futures:
+            wrapped = {asyncio.wrap_future(future): host for future, host in futures.items()}
+            done, _ = await asyncio.wait(wrapped, timeout=self.timeout)
+            for future, host in wrapped.items():
+                answers[host] = future.result() if future in done else None
+        return answers
+
+    def stats(self):
+        with self._lock:
+            negative = sum(1 for resolves, _ in self._entries.values() if not resolves)
+            return {'entries': len(self._entries), 'unresolvable': negative, 'hits': self.hits, 'misses': self.misses}
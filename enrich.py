@@ -0,0 +1,302 @@
+"""
+Bulk enrichment of a CSV or JSONL file of businesses.
+
+    python enrich.py businesses.csv enriched.jsonl --workers 8 --rate www.google.com=0.5
+
+Reads the input as a stream, runs the lookups on a pool of worker threads
+and appends each result to the output (JSONL, or CSV when the output name
+ends in .csv) as soon as it finishes. Every output record carries the
+input's row_index, and progress is checkpointed next to the output file,
+so an interrupted run continues where it stopped when started again with
+the same arguments (--restart starts over).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+RESULT_FIELDS = ['instagram', 'facebook', 'website', 'confidence', 'sources', 'error']
+
+
+def _file_format(path, override=None):
+    if override:
+        return override
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(path, file_format):
+    """Yield (row_index, row dict or None if the line is not valid JSON) without loading the file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if file_format == 'csv':
+            for index, row in enumerate(csv.DictReader(f)):
+                yield index, row
+            return
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield index, row if isinstance(row, dict) else None
+            index += 1
+
+
+class Checkpoint:
+    """
+    Which input rows are finished: every index below watermark, plus the few
+    above it that finished out of order. output_offset is how much of the
+    output file those rows cover; records past it are recovered by scanning.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.watermark = 0
+        self.done_above = set()
+        self.output_offset = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        self.watermark = state['watermark']
+        self.done_above = set(state['done_above'])
+        self.output_offset = state['output_offset']
+        return True
+
+    def save(self, output_offset):
+        self.output_offset = output_offset
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'watermark': self.watermark, 'done_above': sorted(self.done_above),
+                       'output_offset': output_offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def is_done(self, index):
+        return index < self.watermark or index in self.done_above
+
+    def mark_done(self, index):
+        if index < self.watermark:
+            return
+        self.done_above.add(index)
+        while self.watermark in self.done_above:
+            self.done_above.remove(self.watermark)
+            self.watermark += 1
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def recover_output(path, file_format, offset, checkpoint):
+    """
+    Mark rows written to the output after the checkpoint's offset as done, and cut
+    off a partly written last record. Returns the number of records recovered.
+    """
+    if not os.path.exists(path):
+        return 0
+    recovered = 0
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        offset = min(offset, size)
+        f.seek(offset)
+        end = offset
+        header_pending = file_format == 'csv' and offset == 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # Interrupted mid-write
+            end += len(line)
+            if header_pending:
+                header_pending = False
+                continue
+            text = line.decode('utf-8', errors='replace')
+            try:
+                if file_format == 'csv':
+                    index = int(next(csv.reader([text]))[0])
+                else:
+                    index = int(json.loads(text)['row_index'])
+            except (ValueError, KeyError, IndexError, StopIteration):
+                continue
+            checkpoint.mark_done(index)
+            recovered += 1
+        if end < size:
+            f.truncate(end)
+    return recovered
+
+
+class OutputWriter:
+    def __init__(self, path, file_format, input_columns):
+        self.file_format = file_format
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._csv = None
+        if file_format == 'csv':
+            extra = [c for c in input_columns if c not in RESULT_FIELDS and c != 'row_index']
+            self._csv = csv.DictWriter(self._file, fieldnames=['row_index'] + extra + RESULT_FIELDS,
+                                       extrasaction='ignore')
+            if not exists:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            record = dict(record, sources=';'.join(record.get('sources') or []))
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def offset(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class Progress:
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.monotonic()
+        self.last_report = self.start
+        self.done = 0
+        self.skipped = 0
+        self.errors = 0
+        self.found = {'instagram': 0, 'facebook': 0, 'website': 0}
+
+    def record(self, record):
+        self.done += 1
+        if record.get('error'):
+            self.errors += 1
+        for kind in self.found:
+            if record.get(kind):
+                self.found[kind] += 1
+
+    def maybe_report(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        found = ' '.join(f"{kind} {count * 100 // self.done if self.done else 0}%" for kind, count in self.found.items())
+        print(f"[{elapsed:7.0f}s] {self.done} done, {self.skipped} skipped, {self.errors} errors | "
+              f"{rate:.2f} rows/s | found {found}", file=sys.stderr, flush=True)
+
+
+def lookup_row(row, name_column, country_column, cache_mode):
+    """Run one input row through the finder and return its result fields"""
+    from app import lookup
+
+    if row is None:
+        return {'error': 'invalid JSON'}
+    business_name = str(row.get(name_column) or '').strip()
+    if not business_name:
+        return {'error': f'{name_column} is required'}
+    results = lookup(business_name, str(row.get(country_column) or '').strip(), cache_mode)
+    return {field: results.get(field) for field in RESULT_FIELDS if field != 'error'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find social links for every business in a CSV or JSONL file')
+    parser.add_argument('input', help='CSV (with a header row) or JSONL file of businesses')
+    parser.add_argument('output', help='results file; .csv writes CSV, anything else JSONL')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    parser.add_argument('--name-column', default='business_name')
+    parser.add_argument('--country-column', default='country')
+    parser.add_argument('--workers', type=int, default=8, help='lookups running at once (default: 8)')
+    parser.add_argument('--rate', action='append', default=[], metavar='HOST=RPS',
+                        help='requests per second allowed to a host (and its subdomains), e.g. www.google.com=0.5; '
+                             'repeatable, adds to HOST_RATE_LIMITS')
+    parser.add_argument('--cache', choices=['use', 'bypass', 'refresh'], default='use',
+                        help='how lookups use the result cache (default: use)')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: OUTPUT.checkpoint)')
+    parser.add_argument('--checkpoint-every', type=float, default=5.0, help='seconds between checkpoints (default: 5)')
+    parser.add_argument('--progress-every', type=float, default=10.0, help='seconds between progress lines (default: 10)')
+    parser.add_argument('--restart', action='store_true', help='discard earlier output and checkpoint and start over')
+    args = parser.parse_args()
+
+    input_format = _file_format(args.input, args.input_format)
+    output_format = _file_format(args.output)
+    checkpoint = Checkpoint(args.checkpoint or args.output + '.checkpoint')
+
+    if args.restart:
+        checkpoint.delete()
+        if os.path.exists(args.output):
+            os.remove(args.output)
+    checkpoint.load()
+    recovered = recover_output(args.output, output_format, checkpoint.output_offset, checkpoint)
+    if checkpoint.watermark or checkpoint.done_above:
+        print(f"Resuming: {checkpoint.watermark + len(checkpoint.done_above)} rows already done "
+              f"({recovered} recovered from the output)", file=sys.stderr)
+
+    import app
+    for spec in args.rate:
+        host, _, rate = spec.partition('=')
+        for finder in filter(None, (app.get_finder(), app.get_async_finder())):
+            finder.host_rate_limiter.set_rate(host.strip(), float(rate))
+
+    input_columns = []
+    if input_format == 'csv':
+        with open(args.input, newline='', encoding='utf-8-sig') as f:
+            input_columns = next(csv.reader(f), [])
+    writer = OutputWriter(args.output, output_format, input_columns)
+    progress = Progress(args.progress_every)
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix='enrich')
+    pending = {}
+    last_checkpoint = time.monotonic()
+
+    def finish(futures):
+        for future in futures:
+            index, row = pending.pop(future)
+            try:
+                fields = future.result()
+            except Exception as e:
+                fields = {'error': str(e)}
+            # An input row_index column (e.g. from an earlier output file) must not replace the real one
+            columns = {key: value for key, value in (row or {}).items() if key != 'row_index'}
+            record = {'row_index': index, **columns, **fields}
+            writer.write(record)
+            checkpoint.mark_done(index)
+            progress.record(record)
+
+    try:
+        for index, row in read_rows(args.input, input_format):
+            if checkpoint.is_done(index):
+                progress.skipped += 1
+                continue
+            # Keep a bounded number of rows in flight so memory stays flat
+            while len(pending) >= args.workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                finish(done)
+            future = executor.submit(lookup_row, row, args.name_column, args.country_column, args.cache)
+            pending[future] = (index, row)
+
+            if time.monotonic() - last_checkpoint >= args.checkpoint_every:
+                checkpoint.save(writer.offset())
+                last_checkpoint = time.monotonic()
+            progress.maybe_report()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            finish(done)
+            progress.maybe_report()
+    except KeyboardInterrupt:
+        print("Interrupted, saving checkpoint", file=sys.stderr)
+        executor.shutdown(wait=False, cancel_futures=True)
+        checkpoint.save(writer.offset())
+        writer.close()
+        sys.exit(130)
+
+    checkpoint.save(writer.offset())
+    writer.close()
+    executor.shutdown()
+    progress.maybe_report(force=True)
+
+
+if __name__ == '__main__':
+    main()
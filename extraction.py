@@ -0,0 +1,174 @@
+"""
+Single-pass extraction of Instagram, Facebook and website links from text
+such as Google result pages and search snippets.
+
+extract_links scans a page once with one precompiled pattern and sorts every
+URL-like token into ranked Instagram, Facebook and website candidates. Host
+filtering uses precomputed sets of hosts and TLDs, so checking a candidate
+costs a few set lookups instead of substring loops.
+"""
+import re
+from functools import lru_cache
+
+# Hosts that are never a business's own website; subdomains are skipped too
+SKIP_HOSTS = frozenset([
+    'facebook.com', 'instagram.com', 'twitter.com', 'x.com', 'linkedin.com',
+    'youtube.com', 'tiktok.com', 'pinterest.com', 'snapchat.com',
+    'google.com', 'googleusercontent.com', 'googleapis.com', 'gstatic.com', 'goo.gl',
+    'yelp.com', 'tripadvisor.com', 'foursquare.com', 'zomato.com', 'opentable.com',
+    'wikipedia.org', 'maps.apple.com', 'bing.com', 'yahoo.com', 'duckduckgo.com',
+    'schema.org', 'w3.org',
+])
+
+# Website hosts must sit under one of these TLDs (or e.g. .com.kw)
+VALID_TLDS = frozenset([
+    'com', 'net', 'org', 'co', 'io', 'me', 'info', 'biz',
+    'ae', 'kw', 'sa', 'qa', 'bh', 'om', 'jo', 'lb', 'eg',
+])
+
+# Facebook paths that can never be a page
+FACEBOOK_SKIP_PATHS = frozenset(['pages', 'profile', 'people'])
+
+# First path segments that are site features rather than accounts; ranked last
+INSTAGRAM_RESERVED_PATHS = frozenset([
+    'p', 'reel', 'reels', 'explore', 'accounts', 'stories', 'tv', 'direct', 'about', 'legal', 'developer',
+])
+FACEBOOK_RESERVED_PATHS = frozenset([
+    'sharer', 'sharer.php', 'share', 'dialog', 'plugins', 'tr', 'login', 'login.php', 'home', 'home.php',
+    'watch', 'groups', 'events', 'marketplace', 'help', 'policies', 'photo.php', 'story.php', 'permalink.php',
+])
+
+# One pattern for every token of interest, matched against lowercased text:
+#   full URLs, bare "www./site./website./visit." domains, and bare instagram.com/ or facebook.com/ paths.
+# No IGNORECASE and no leading \b, so re can skip ahead on the first character; word
+# boundaries for the bare forms are checked by hand.
+_TOKEN_RE = re.compile(
+    r"""(?:https?://[^\s"'<>\\]+"""
+    r"""|(?:www|website|site|visit)\.([a-z0-9][a-z0-9-]*\.[a-z]{2,}(?:\.[a-z]{2,})?)"""
+    r"""|((?:instagram|facebook)\.com/[a-z0-9_.]+))"""
+)
+_URL_HOST_RE = re.compile(r'[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?(?:www\.)?([^/?#:]*)')
+_BARE_HOST_RE = re.compile(r'(?:www\.)?([^/?#:]*)')
+_HANDLE_RE = re.compile(r'[a-zA-Z0-9_.]+')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+
+def _split_url(token):
+    """Return (host, path) for a lowercase URL-like token, without www."""
+    match = _URL_HOST_RE.match(token) or _BARE_HOST_RE.match(token)
+    return match.group(1).rstrip('.'), token[match.end():]
+
+
+def _is_skipped_host(host):
+    """Check host and each of its parent domains against SKIP_HOSTS"""
+    while '.' in host:
+        if host in SKIP_HOSTS:
+            return True
+        host = host[host.index('.') + 1:]
+    return False
+
+
+def _site_name(host):
+    """
+    The label naming the site in host: brand in brand.com, brand.com.kw or shop.brand.com.
+    None when no label after the first is in VALID_TLDS.
+    """
+    labels = host.split('.')
+    for i in range(1, len(labels)):
+        if labels[i] in VALID_TLDS:
+            return labels[i - 1]
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _website_name(host):
+    """_site_name of a host that isn't skipped, else None; cached since result pages repeat a few hosts"""
+    if not host or _is_skipped_host(host):
+        return None
+    return _site_name(host)
+
+
+def is_likely_website(url):
+    """Check if a URL is likely an official business website"""
+    if not url:
+        return False
+    lowered = url.lower()
+    # Must be http/https
+    if not lowered.startswith(('http://', 'https://')):
+        return False
+    host, _ = _split_url(lowered)
+    # Prefer .com, .net, .org, country-specific TLDs
+    return _website_name(host) is not None
+
+
+def _first_segment(path):
+    match = _HANDLE_RE.match(path.lstrip('/'))
+    return match.group(0) if match else ''
+
+
+def extract_links(text, business_name=None):
+    """
+    Scan text once and return {'instagram': [...], 'facebook': [...], 'website': [...]},
+    each a ranked list of normalized candidate URLs without duplicates.
+
+    Social links written as full URLs rank ahead of bare mentions, and
+    feature paths (posts, share dialogs, login) rank last. Websites whose
+    domain matches the business name rank first, then come full URLs in
+    page order, then bare www./site. mentions.
+    """
+    instagram = {}
+    facebook = {}
+    website = {}
+    position = 0
+
+    lowered = text.lower()
+    # Handles keep their original case, read from text at the same offsets when lowercasing kept the length
+    original = text if len(lowered) == len(text) else lowered
+
+    for match in _TOKEN_RE.finditer(lowered):
+        bare_domain, bare_social = match.group(1), match.group(2)
+        if bare_domain or bare_social:
+            start = match.start()
+            if start and (lowered[start - 1].isalnum() or lowered[start - 1] in '_-'):
+                continue  # Part of a longer word, e.g. mywebsite.com or notinstagram.com
+            full_url = False
+        else:
+            full_url = True
+        position += 1
+
+        if bare_domain:
+            host, path = bare_domain, ''
+        else:
+            host, path = _split_url(match.group(0))
+
+        if host == 'instagram.com' or host.endswith('.instagram.com'):
+            username = _first_segment(original[match.end() - len(path):match.end()])
+            if len(username) > 1 and username not in instagram:
+                reserved = username.lower() in INSTAGRAM_RESERVED_PATHS
+                instagram[username] = (reserved, not full_url, position)
+        elif host == 'facebook.com' or host.endswith('.facebook.com'):
+            page = _first_segment(original[match.end() - len(path):match.end()])
+            if len(page) > 1 and page not in facebook and page.lower() not in FACEBOOK_SKIP_PATHS:
+                reserved = page.lower() in FACEBOOK_RESERVED_PATHS
+                facebook[page] = (reserved, not full_url, position)
+        elif host not in website:
+            # Subdomain sites such as shop.brand.com count too, named by their brand label
+            site_name = _website_name(host)
+            if site_name:
+                website[host] = (not full_url, position, site_name)
+
+    name_key = _NON_ALNUM_RE.sub('', business_name.lower()) if business_name else ''
+
+    def website_rank(item):
+        host, (bare, order, site_name) = item
+        domain_key = _NON_ALNUM_RE.sub('', site_name)
+        matches_name = bool(name_key and domain_key and (name_key in domain_key or domain_key in name_key))
+        return (not matches_name, bare, order)
+
+    return {
+        'instagram': [f"https://www.instagram.com/{username}/"
+                      for username, _ in sorted(instagram.items(), key=lambda item: item[1])],
+        'facebook': [f"https://www.facebook.com/{page}/"
+                     for page, _ in sorted(facebook.items(), key=lambda item: item[1])],
+        'website': [f"https://{host}" for host, _ in sorted(website.items(), key=website_rank)],
+    }
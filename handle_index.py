@@ -0,0 +1,307 @@
+"""
+Local index of verified business -> Instagram/Facebook/website mappings.
+
+Every high-confidence lookup result is recorded here, and known mappings can
+be bulk-loaded from a CSV or JSONL file:
+
+    python handle_index.py import verified.csv
+    python handle_index.py stats
+
+Entries persist in SQLite (shared by every process on the machine) and are
+served from an in-memory trigram inverted index, so a lookup for a name that
+is identical or nearly identical to an indexed one ("McDonalds Kuwait" vs
+"McDonald's" in Kuwait) is answered without any network access. Words of the
+country name are dropped from business names before matching, and a match
+must be in the same country.
+
+Building the in-memory index takes a while for large files (one to two
+seconds per 50,000 entries), so it can be loaded on a background thread (preload=False,
+used for serverless cold starts). Until it is ready only exact name matches
+are answered, straight from SQLite.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from normalization import country_code, country_key
+from scoring import normalize, trigrams
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'social_finder_handles.sqlite3')
+
+LINK_FIELDS = ('instagram', 'facebook', 'website')
+
+
+def index_name(business_name, country):
+    """The business name as it is matched: normalized, spaces removed, without the country's words"""
+    tokens = normalize(business_name or '').split()
+    country_words = set(country_key(country).split()) if country else set()
+    kept = [token for token in tokens if token not in country_words]
+    return ''.join(kept or tokens)
+
+
+class HandleIndex:
+    def __init__(self, path=DEFAULT_PATH, threshold=0.9, max_age=90 * 86400, refresh_interval=30.0, preload=True):
+        self.path = path
+        self.threshold = threshold                  # Trigram Dice score a fuzzy match needs
+        self.max_age = max_age                      # Seconds an entry is trusted after it was verified
+        self.refresh_interval = refresh_interval    # Seconds between reads of entries added by other processes
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (grams, entry dict)
+        self._postings = {}  # trigram -> set of keys
+        self._synced_at = 0.0
+        self._last_refresh = 0.0
+        self.hits = 0
+        self._loaded = threading.Event()
+        self._init_schema()
+        if preload:
+            self._load()
+        else:
+            threading.Thread(target=self._load, name='handle-index-load', daemon=True).start()
+
+    @classmethod
+    def from_env(cls, preload=True):
+        """
+        Build an index from HANDLE_INDEX_PATH, HANDLE_INDEX_THRESHOLD and HANDLE_INDEX_MAX_AGE_DAYS,
+        or return None if it is disabled (HANDLE_INDEX_PATH set to an empty string)
+        """
+        path = os.getenv('HANDLE_INDEX_PATH', DEFAULT_PATH)
+        if not path:
+            return None
+        try:
+            return cls(
+                path,
+                threshold=float(os.getenv('HANDLE_INDEX_THRESHOLD', '0.9')),
+                max_age=float(os.getenv('HANDLE_INDEX_MAX_AGE_DAYS', '90')) * 86400,
+                preload=preload
+            )
+        except sqlite3.Error as e:
+            print(f"Handle index disabled, could not open {path}: {e}")
+            return None
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        # WAL lets readers in other processes proceed while one process writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS handles (
+                key TEXT PRIMARY KEY,
+                entry TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS handles_updated_at ON handles (updated_at)')
+
+    def _load(self):
+        """Build the in-memory index from every stored entry"""
+        self._refresh(force=True)
+        self._loaded.set()
+
+    def _refresh(self, force=False):
+        """Load entries written since the last refresh (by this or another process)"""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        try:
+            rows = self._connect().execute(
+                'SELECT key, entry, updated_at FROM handles WHERE updated_at >= ? ORDER BY updated_at',
+                (self._synced_at,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Handle index read error: {e}")
+            return
+        for key, entry, updated_at in rows:
+            self._add_to_memory(key, json.loads(entry))
+            self._synced_at = max(self._synced_at, updated_at)
+
+    def _add_to_memory(self, key, entry):
+        grams = trigrams(key.partition('|')[0])
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is None:
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(key)
+            self._entries[key] = (grams, entry)
+
+    def _entry(self, business_name, country, results, source):
+        """(key, entry) for a result, or None if it has no name or links to index"""
+        links = {field: results.get(field) for field in LINK_FIELDS}
+        name = index_name(business_name, country)
+        if not name or not any(links.values()):
+            return None
+        entry = {
+            'business_name': business_name,
+            'country': country or '',
+            **links,
+            'confidence': results.get('confidence') or 'high',
+            'scores': results.get('scores') or {},
+            'source': source,
+            'verified_at': time.time(),
+        }
+        return f"{name}|{country_code(country)}", entry
+
+    def _store(self, items):
+        """Write (key, entry) pairs in one transaction and index them; returns whether they were stored"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO handles (key, entry, updated_at) VALUES (?, ?, ?)',
+                [(key, json.dumps(entry), entry['verified_at']) for key, entry in items]
+            )
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Handle index write error: {e}")
+            return False
+        for key, entry in items:
+            self._add_to_memory(key, entry)
+        return True
+
+    def add(self, business_name, country, results, source='lookup'):
+        """Record the links of a verified result and return whether it was stored (results without links are not)"""
+        item = self._entry(business_name, country, results, source)
+        return item is not None and self._store([item])
+
+    def match(self, business_name, country):
+        """
+        The indexed entry whose name best matches business_name in the same country,
+        as (entry, score), or None when no entry reaches the threshold
+        """
+        name = index_name(business_name, country)
+        if not name:
+            return None
+        code = country_code(country)
+        suffix = f"|{code}"
+        oldest = time.time() - self.max_age
+        if not self._loaded.is_set():
+            return self._match_stored(name + suffix, oldest)
+        self._refresh()
+
+        with self._lock:
+            exact = self._entries.get(name + suffix)
+            if exact is not None and exact[1]['verified_at'] >= oldest:
+                self.hits += 1
+                return exact[1], 1.0
+
+            # A Dice score of at least t needs ceil(t * |q| / (2 - t)) shared grams, so any match
+            # shares one of the |q| - that + 1 rarest query grams: only those are looked up
+            grams = trigrams(name)
+            needed = max(1, math.ceil(self.threshold * len(grams) / (2 - self.threshold)))
+            rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))[:len(grams) - needed + 1]
+            candidates = set()
+            for gram in rarest:
+                candidates.update(key for key in self._postings.get(gram, ()) if key.endswith(suffix))
+
+            best = None
+            for key in candidates:
+                entry_grams, entry = self._entries[key]
+                score = 2 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+                if score < self.threshold or entry['verified_at'] < oldest:
+                    continue
+                if best is None or (score, entry['verified_at']) > (best[1], best[0]['verified_at']):
+                    best = (entry, score)
+            if best is not None:
+                self.hits += 1
+            return best
+
+    def _match_stored(self, key, oldest):
+        """Exact match read from SQLite, for while the in-memory index is still loading"""
+        try:
+            row = self._connect().execute('SELECT entry FROM handles WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Handle index read error: {e}")
+            return None
+        if row is None:
+            return None
+        entry = json.loads(row[0])
+        if entry['verified_at'] < oldest:
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry, 1.0
+
+    def results_for(self, business_name, country):
+        """Lookup results (as find_social_links returns them) built from a matching entry, or None"""
+        found = self.match(business_name, country)
+        if found is None:
+            return None
+        entry, score = found
+        return {
+            **{field: entry.get(field) for field in LINK_FIELDS},
+            'confidence': entry['confidence'],
+            'sources': ['local_index'],
+            'scores': entry.get('scores') or {},
+            'index_match': {'business_name': entry['business_name'], 'score': round(score, 3)},
+        }
+
+    def load_file(self, path, batch_size=1000):
+        """Bulk-load entries from a CSV (with a header row) or JSONL file; returns the number added"""
+        added = 0
+        batch = []
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            if path.lower().endswith('.csv'):
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for row in rows:
+                results = {field: (row.get(field) or '').strip() or None for field in LINK_FIELDS}
+                results['confidence'] = row.get('confidence') or 'high'
+                item = self._entry((row.get('business_name') or '').strip(), (row.get('country') or '').strip(),
+                                   results, 'import')
+                if item is not None:
+                    batch.append(item)
+                if len(batch) >= batch_size:
+                    added += len(batch) if self._store(batch) else 0
+                    batch = []
+        if batch:
+            added += len(batch) if self._store(batch) else 0
+        return added
+
+    def stats(self):
+        with self._lock:
+            sources = {}
+            for _, entry in self._entries.values():
+                sources[entry['source']] = sources.get(entry['source'], 0) + 1
+            return {'entries': len(self._entries), 'by_source': sources, 'hits': self.hits,
+                    'loaded': self._loaded.is_set()}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the local index of verified social links')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    load = subparsers.add_parser('import', help='bulk-load verified mappings from a CSV or JSONL file')
+    load.add_argument('file', help='rows with business_name, country, instagram, facebook and website')
+    subparsers.add_parser('stats', help='show the number of indexed entries')
+    args = parser.parse_args()
+
+    index = HandleIndex.from_env()
+    if index is None:
+        parser.error('the handle index is disabled (HANDLE_INDEX_PATH is empty)')
+    if args.command == 'import':
+        print(f"Imported {index.load_file(args.file)} entries into {index.path}")
+    print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
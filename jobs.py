@@ -0,0 +1,290 @@
+"""
+Background lookup jobs.
+
+POST /api/jobs stores a job and returns right away; a bounded pool of worker
+threads claims queued jobs and runs the lookups. Job state lives in SQLite,
+so any number of worker processes on the same machine can share one queue:
+the web process can run its own workers (JOB_WORKERS) or only enqueue
+(JOB_WORKERS=0) while dedicated worker processes drain the queue:
+
+    python jobs.py --workers 8
+
+Jobs claimed by a worker that died are queued again after JOB_STALE_SECONDS,
+up to JOB_MAX_ATTEMPTS times.
+
+Serverless instances run no worker threads (they are frozen between
+requests). There a GET /api/jobs/<id>?wait=... that finds the job still
+queued runs it itself (JOB_RUN_INLINE). The store is per instance unless
+JOB_STORE_PATH points at storage every instance shares, so a poll answered
+by another instance doesn't know the job.
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'social_finder_jobs.sqlite3')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED = (DONE, FAILED)
+
+
+class JobStore:
+    def __init__(self, path=DEFAULT_PATH, retention=86400, stale_after=300, max_attempts=3):
+        self.path = path
+        self.retention = retention          # Seconds finished jobs are kept
+        self.stale_after = stale_after      # Seconds after which a running job is presumed abandoned
+        self.max_attempts = max_attempts
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        # Wakes waiters in this process when a job finishes; other processes are seen by polling
+        self._changed = threading.Condition()
+        self._init_schema()
+
+    @classmethod
+    def from_env(cls):
+        """Build a store from JOB_STORE_PATH, JOB_RETENTION_SECONDS, JOB_STALE_SECONDS and JOB_MAX_ATTEMPTS"""
+        return cls(
+            os.getenv('JOB_STORE_PATH') or DEFAULT_PATH,
+            retention=int(os.getenv('JOB_RETENTION_SECONDS', '86400')),
+            stale_after=int(os.getenv('JOB_STALE_SECONDS', '300')),
+            max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        # WAL lets readers in other processes proceed while one process writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                business_name TEXT NOT NULL,
+                country TEXT NOT NULL,
+                cache_mode TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)')
+
+    def create(self, business_name, country, cache_mode='use'):
+        """Queue a lookup and return its job ID"""
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            'INSERT INTO jobs (id, business_name, country, cache_mode, status, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, business_name, country, cache_mode, QUEUED, time.time())
+        )
+        return job_id
+
+    def get(self, job_id):
+        """The job as a dict (result decoded), or None if it doesn't exist"""
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def claim(self, worker, job_id=None):
+        """
+        Atomically move the oldest queued job (or job_id, if it is queued) to running
+        and return it, or None if there is no such job
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if job_id is None:
+                row = conn.execute(
+                    'SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1', (QUEUED,)
+                ).fetchone()
+            else:
+                row = conn.execute('SELECT * FROM jobs WHERE id = ? AND status = ?', (job_id, QUEUED)).fetchone()
+            if row is not None:
+                conn.execute(
+                    'UPDATE jobs SET status = ?, worker = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?',
+                    (RUNNING, worker, time.time(), row['id'])
+                )
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        return dict(row) if row is not None else None
+
+    def complete(self, job_id, result):
+        self._finish(job_id, DONE, result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+            (status, result, error, time.time(), job_id)
+        )
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait(self, job_id, timeout, poll_interval=0.25):
+        """
+        Return the job once it has finished or timeout seconds have passed,
+        whichever comes first (None if it doesn't exist)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(remaining, poll_interval))
+
+    def maintain(self):
+        """Requeue jobs abandoned by dead workers (or fail them after max_attempts) and drop expired jobs"""
+        now = time.time()
+        conn = self._connect()
+        stale_before = now - self.stale_after
+        conn.execute(
+            'UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND started_at < ? AND attempts >= ?',
+            (FAILED, 'worker stopped before finishing the job', now, RUNNING, stale_before, self.max_attempts)
+        )
+        conn.execute(
+            'UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND started_at < ?',
+            (QUEUED, RUNNING, stale_before)
+        )
+        conn.execute(
+            'DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?', (DONE, FAILED, now - self.retention)
+        )
+
+    def counts(self):
+        """Number of jobs per status"""
+        rows = self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+class JobWorkerPool:
+    """
+    A fixed number of worker threads that claim queued jobs from a JobStore and
+    run them with run(business_name, country, cache_mode)
+    """
+    def __init__(self, store, run, workers=4, poll_interval=1.0, maintain_interval=60.0):
+        self.store = store
+        self.run = run
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.maintain_interval = maintain_interval
+        self._wake = threading.Condition()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._last_maintain = 0.0
+
+    def start(self):
+        """Start the worker threads (once); does nothing when workers is 0"""
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            prefix = f"{socket.gethostname()}-{os.getpid()}"
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(f"{prefix}-{index}",),
+                                          name=f'job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        """Wake an idle worker because a job was just queued in this process"""
+        with self._wake:
+            self._wake.notify()
+
+    def _work(self, worker):
+        while True:
+            try:
+                self._maybe_maintain()
+                job = self.store.claim(worker)
+            except sqlite3.Error as e:
+                print(f"Job store error: {e}")
+                job = None
+
+            if job is None:
+                # Jobs queued by other processes are picked up on the next poll
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job, **kwargs):
+        """Run a claimed job and store its result or error"""
+        try:
+            result = self.run(job['business_name'], job['country'], job['cache_mode'], **kwargs)
+            self.store.complete(job['id'], result)
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            try:
+                self.store.fail(job['id'], str(e))
+            except sqlite3.Error as store_error:
+                print(f"Job store error: {store_error}")
+
+    def run_now(self, job_id, timeout=None):
+        """
+        Run a queued job in the calling thread, with a time budget of timeout seconds,
+        and return whether it was still queued. Used where no worker may pick it up,
+        e.g. on serverless instances, which are frozen between requests.
+        """
+        job = self.store.claim(f"{socket.gethostname()}-{os.getpid()}-inline", job_id)
+        if job is None:
+            return False
+        self._execute(job, timeout=timeout)
+        return True
+
+    def _maybe_maintain(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_maintain < self.maintain_interval:
+                return
+            self._last_maintain = now
+        self.store.maintain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run lookup job workers against the shared job store')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('JOB_WORKERS', '4')))
+    args = parser.parse_args()
+
+    from app import lookup, get_job_store  # Imported here so app.py can import this module
+
+    job_store = get_job_store()
+    pool = JobWorkerPool(job_store, lookup, workers=max(1, args.workers))
+    pool.start()
+    print(f"Running {pool.workers} job workers on {job_store.path}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
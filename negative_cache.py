@@ -0,0 +1,111 @@
+"""
+Short-lived cache of candidate URLs known to be dead.
+
+Most probes go to guessed handles and domains that never exist. Remembering
+the outcome for a while lets later lookups skip those guesses without a
+network round trip. Each kind of failure keeps its own expiry.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+NOT_FOUND = 'not_found'        # HTTP 404
+ERROR_PAGE = 'error_page'      # 200 response whose content says the page doesn't exist
+DNS_FAILURE = 'dns_failure'    # Host name did not resolve
+
+# Seconds an outcome is remembered, by kind
+DEFAULT_TTLS = {
+    NOT_FOUND: 6 * 3600,
+    ERROR_PAGE: 3600,
+    DNS_FAILURE: 1800,
+}
+
+# Fragments of the messages urllib3/socket use for name resolution failures
+_DNS_ERROR_MARKERS = (
+    'nameresolutionerror',
+    'name or service not known',
+    'nodename nor servname',
+    'getaddrinfo failed',
+    'temporary failure in name resolution',
+    'no address associated with hostname',
+)
+
+
+def normalize_url(url):
+    """
+    Reduce a URL to the form used as cache key: lowercase host and path,
+    no scheme, query or trailing slash. www. is kept since www and apex
+    hosts of a guessed domain often behave differently.
+    """
+    parsed = urlparse(url.strip().lower())
+    return f"{parsed.netloc}{parsed.path.rstrip('/')}"
+
+
+def is_dns_failure(error):
+    """Check whether a requests exception was caused by a failed host name lookup"""
+    message = repr(error).lower()
+    return any(marker in message for marker in _DNS_ERROR_MARKERS)
+
+
+class NegativeCache:
+    def __init__(self, ttls=None, max_entries=50000):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (kind, expires_at), oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache with TTLs from NEGATIVE_CACHE_TTL_<KIND> environment variables"""
+        ttls = {}
+        for kind in DEFAULT_TTLS:
+            value = os.getenv(f'NEGATIVE_CACHE_TTL_{kind.upper()}')
+            if value:
+                ttls[kind] = int(value)
+        max_entries = int(os.getenv('NEGATIVE_CACHE_MAX_ENTRIES', '50000'))
+        return cls(ttls=ttls, max_entries=max_entries)
+
+    def get(self, url):
+        """Return the failure kind recorded for url, or None if it isn't known to be dead"""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            kind, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self.hits += 1
+            return kind
+
+    def add(self, url, kind):
+        """Remember that url failed with the given kind"""
+        ttl = self.ttls.get(kind)
+        if not ttl:
+            return
+        key = normalize_url(url)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (kind, time.time() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Number of live entries per kind and hits so far"""
+        now = time.time()
+        with self._lock:
+            counts = {kind: 0 for kind in self.ttls}
+            for kind, expires_at in self._entries.values():
+                if expires_at > now:
+                    counts[kind] = counts.get(kind, 0) + 1
+            return {'entries': counts, 'hits': self.hits}
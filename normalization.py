@@ -0,0 +1,440 @@
+"""
+Normalization of a lookup's inputs into a reusable plan.
+
+A NamePlan holds everything the discovery methods derive from the business
+name and country: the cleaned name, its tokens, the country code, and the
+handle and domain candidates to probe. Plans are memoized, so a lookup
+builds its plan once and repeated lookups (batches, retries) reuse it.
+
+Country names resolve through COUNTRY_CODES, built once at import from the
+ISO 3166-1 table below plus common aliases; alpha-2 and alpha-3 codes are
+accepted as well.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# ISO 3166-1: alpha-2, alpha-3, short name. A name with a qualifier after the
+# comma ("Korea, Republic of") is also indexed by the part before it unless
+# another country already has that name.
+ISO_3166 = """
+AD AND Andorra
+AE ARE United Arab Emirates
+AF AFG Afghanistan
+AG ATG Antigua and Barbuda
+AI AIA Anguilla
+AL ALB Albania
+AM ARM Armenia
+AO AGO Angola
+AQ ATA Antarctica
+AR ARG Argentina
+AS ASM American Samoa
+AT AUT Austria
+AU AUS Australia
+AW ABW Aruba
+AX ALA Aland Islands
+AZ AZE Azerbaijan
+BA BIH Bosnia and Herzegovina
+BB BRB Barbados
+BD BGD Bangladesh
+BE BEL Belgium
+BF BFA Burkina Faso
+BG BGR Bulgaria
+BH BHR Bahrain
+BI BDI Burundi
+BJ BEN Benin
+BL BLM Saint Barthelemy
+BM BMU Bermuda
+BN BRN Brunei Darussalam
+BO BOL Bolivia, Plurinational State of
+BQ BES Bonaire, Sint Eustatius and Saba
+BR BRA Brazil
+BS BHS Bahamas
+BT BTN Bhutan
+BV BVT Bouvet Island
+BW BWA Botswana
+BY BLR Belarus
+BZ BLZ Belize
+CA CAN Canada
+CC CCK Cocos (Keeling) Islands
+CD COD Congo, Democratic Republic of the
+CF CAF Central African Republic
+CG COG Congo
+CH CHE Switzerland
+CI CIV Cote d'Ivoire
+CK COK Cook Islands
+CL CHL Chile
+CM CMR Cameroon
+CN CHN China
+CO COL Colombia
+CR CRI Costa Rica
+CU CUB Cuba
+CV CPV Cabo Verde
+CW CUW Curacao
+CX CXR Christmas Island
+CY CYP Cyprus
+CZ CZE Czechia
+DE DEU Germany
+DJ DJI Djibouti
+DK DNK Denmark
+DM DMA Dominica
+DO DOM Dominican Republic
+DZ DZA Algeria
+EC ECU Ecuador
+EE EST Estonia
+EG EGY Egypt
+EH ESH Western Sahara
+ER ERI Eritrea
+ES ESP Spain
+ET ETH Ethiopia
+FI FIN Finland
+FJ FJI Fiji
+FK FLK Falkland Islands (Malvinas)
+FM FSM Micronesia, Federated States of
+FO FRO Faroe Islands
+FR FRA France
+GA GAB Gabon
+GB GBR United Kingdom of Great Britain and Northern Ireland
+GD GRD Grenada
+GE GEO Georgia
+GF GUF French Guiana
+GG GGY Guernsey
+GH GHA Ghana
+GI GIB Gibraltar
+GL GRL Greenland
+GM GMB Gambia
+GN GIN Guinea
+GP GLP Guadeloupe
+GQ GNQ Equatorial Guinea
+GR GRC Greece
+GS SGS South Georgia and the South Sandwich Islands
+GT GTM Guatemala
+GU GUM Guam
+GW GNB Guinea-Bissau
+GY GUY Guyana
+HK HKG Hong Kong
+HM HMD Heard Island and McDonald Islands
+HN HND Honduras
+HR HRV Croatia
+HT HTI Haiti
+HU HUN Hungary
+ID IDN Indonesia
+IE IRL Ireland
+IL ISR Israel
+IM IMN Isle of Man
+IN IND India
+IO IOT British Indian Ocean Territory
+IQ IRQ Iraq
+IR IRN Iran, Islamic Republic of
+IS ISL Iceland
+IT ITA Italy
+JE JEY Jersey
+JM JAM Jamaica
+JO JOR Jordan
+JP JPN Japan
+KE KEN Kenya
+KG KGZ Kyrgyzstan
+KH KHM Cambodia
+KI KIR Kiribati
+KM COM Comoros
+KN KNA Saint Kitts and Nevis
+KP PRK Korea, Democratic People's Republic of
+KR KOR Korea, Republic of
+KW KWT Kuwait
+KY CYM Cayman Islands
+KZ KAZ Kazakhstan
+LA LAO Lao People's Democratic Republic
+LB LBN Lebanon
+LC LCA Saint Lucia
+LI LIE Liechtenstein
+LK LKA Sri Lanka
+LR LBR Liberia
+LS LSO Lesotho
+LT LTU Lithuania
+LU LUX Luxembourg
+LV LVA Latvia
+LY LBY Libya
+MA MAR Morocco
+MC MCO Monaco
+MD MDA Moldova, Republic of
+ME MNE Montenegro
+MF MAF Saint Martin (French part)
+MG MDG Madagascar
+MH MHL Marshall Islands
+MK MKD North Macedonia
+ML MLI Mali
+MM MMR Myanmar
+MN MNG Mongolia
+MO MAC Macao
+MP MNP Northern Mariana Islands
+MQ MTQ Martinique
+MR MRT Mauritania
+MS MSR Montserrat
+MT MLT Malta
+MU MUS Mauritius
+MV MDV Maldives
+MW MWI Malawi
+MX MEX Mexico
+MY MYS Malaysia
+MZ MOZ Mozambique
+NA NAM Namibia
+NC NCL New Caledonia
+NE NER Niger
+NF NFK Norfolk Island
+NG NGA Nigeria
+NI NIC Nicaragua
+NL NLD Netherlands
+NO NOR Norway
+NP NPL Nepal
+NR NRU Nauru
+NU NIU Niue
+NZ NZL New Zealand
+OM OMN Oman
+PA PAN Panama
+PE PER Peru
+PF PYF French Polynesia
+PG PNG Papua New Guinea
+PH PHL Philippines
+PK PAK Pakistan
+PL POL Poland
+PM SPM Saint Pierre and Miquelon
+PN PCN Pitcairn
+PR PRI Puerto Rico
+PS PSE Palestine, State of
+PT PRT Portugal
+PW PLW Palau
+PY PRY Paraguay
+QA QAT Qatar
+RE REU Reunion
+RO ROU Romania
+RS SRB Serbia
+RU RUS Russian Federation
+RW RWA Rwanda
+SA SAU Saudi Arabia
+SB SLB Solomon Islands
+SC SYC Seychelles
+SD SDN Sudan
+SE SWE Sweden
+SG SGP Singapore
+SH SHN Saint Helena, Ascension and Tristan da Cunha
+SI SVN Slovenia
+SJ SJM Svalbard and Jan Mayen
+SK SVK Slovakia
+SL SLE Sierra Leone
+SM SMR San Marino
+SN SEN Senegal
+SO SOM Somalia
+SR SUR Suriname
+SS SSD South Sudan
+ST STP Sao Tome and Principe
+SV SLV El Salvador
+SX SXM Sint Maarten (Dutch part)
+SY SYR Syrian Arab Republic
+SZ SWZ Eswatini
+TC TCA Turks and Caicos Islands
+TD TCD Chad
+TF ATF French Southern Territories
+TG TGO Togo
+TH THA Thailand
+TJ TJK Tajikistan
+TK TKL Tokelau
+TL TLS Timor-Leste
+TM TKM Turkmenistan
+TN TUN Tunisia
+TO TON Tonga
+TR TUR Turkiye
+TT TTO Trinidad and Tobago
+TV TUV Tuvalu
+TW TWN Taiwan, Province of China
+TZ TZA Tanzania, United Republic of
+UA UKR Ukraine
+UG UGA Uganda
+UM UMI United States Minor Outlying Islands
+US USA United States of America
+UY URY Uruguay
+UZ UZB Uzbekistan
+VA VAT Holy See
+VC VCT Saint Vincent and the Grenadines
+VE VEN Venezuela, Bolivarian Republic of
+VG VGB Virgin Islands (British)
+VI VIR Virgin Islands (U.S.)
+VN VNM Viet Nam
+VU VUT Vanuatu
+WF WLF Wallis and Futuna
+WS WSM Samoa
+YE YEM Yemen
+YT MYT Mayotte
+ZA ZAF South Africa
+ZM ZMB Zambia
+ZW ZWE Zimbabwe
+"""
+
+# Common names that differ from the ISO short name; these take precedence
+COUNTRY_ALIASES = {
+    'uae': 'ae', 'emirates': 'ae',
+    'ksa': 'sa', 'kingdom of saudi arabia': 'sa',
+    'usa': 'us', 'united states': 'us', 'america': 'us',
+    'uk': 'gb', 'united kingdom': 'gb', 'great britain': 'gb', 'britain': 'gb',
+    'england': 'gb', 'scotland': 'gb', 'wales': 'gb', 'northern ireland': 'gb',
+    'south korea': 'kr', 'korea': 'kr', 'north korea': 'kp',
+    'russia': 'ru', 'syria': 'sy', 'iran': 'ir', 'laos': 'la', 'vietnam': 'vn',
+    'turkey': 'tr', 'czech republic': 'cz', 'ivory coast': 'ci', 'cape verde': 'cv',
+    'swaziland': 'sz', 'macedonia': 'mk', 'burma': 'mm', 'holland': 'nl', 'brunei': 'bn',
+    'east timor': 'tl', 'vatican': 'va', 'vatican city': 'va', 'palestine': 'ps',
+    'drc': 'cd', 'dr congo': 'cd', 'democratic republic of the congo': 'cd',
+    'republic of the congo': 'cg', 'congo brazzaville': 'cg', 'congo kinshasa': 'cd',
+    'bosnia': 'ba', 'trinidad': 'tt', 'st lucia': 'lc', 'st kitts and nevis': 'kn',
+    'st vincent and the grenadines': 'vc', 'hong kong sar': 'hk', 'macau': 'mo',
+}
+
+_APOSTROPHE_RE = re.compile(r"['’`.]")
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+_QUALIFIER_RE = re.compile(r'\s*[,(].*$')
+
+# Suffixes stripped from names for handle candidates (checked in this order)
+HANDLE_SUFFIXES = (' inc', ' inc.', ' llc', ' ltd', ' ltd.', ' corp', ' corp.', ' company', ' co', ' co.',
+                   ' studios', ' studio')
+# ...and from the compacted name for domain candidates
+DOMAIN_SUFFIXES = ('inc', 'llc', 'ltd', 'corp', 'company', 'co', 'studios', 'studio')
+MAX_HANDLES = 20
+MAX_DOMAINS = 10
+
+
+def country_key(text):
+    """Normalize a country name for COUNTRY_CODES: lowercase ASCII words, no punctuation or leading 'the'"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = _NON_ALNUM_RE.sub(' ', _APOSTROPHE_RE.sub('', text.replace('&', ' and '))).strip()
+    return text[4:] if text.startswith('the ') else text
+
+
+def _build_country_codes():
+    codes = {}
+    rows = [line.split(' ', 2) for line in ISO_3166.strip().splitlines()]
+    for alpha2, alpha3, name in rows:
+        codes[country_key(name)] = alpha2.lower()
+    for alpha2, alpha3, name in rows:
+        codes.setdefault(country_key(_QUALIFIER_RE.sub('', name)), alpha2.lower())
+        codes.setdefault(alpha2.lower(), alpha2.lower())
+        codes.setdefault(alpha3.lower(), alpha2.lower())
+    codes.update((country_key(alias), code) for alias, code in COUNTRY_ALIASES.items())
+    return codes
+
+
+COUNTRY_CODES = _build_country_codes()
+
+
+def country_code(country):
+    """Two-letter code for a country name, alias or ISO code, or '' if unknown"""
+    if not country:
+        return ''
+    # Most inputs are already a plain lowercase key once trimmed
+    code = COUNTRY_CODES.get(country.strip().lower())
+    return code if code is not None else COUNTRY_CODES.get(country_key(country), '')
+
+
+def _unique(values, limit):
+    seen = set()
+    unique = []
+    for value in values:
+        if value and value not in seen:
+            seen.add(value)
+            unique.append(value)
+    return tuple(unique[:limit])
+
+
+def _handle_variations(clean_name, code):
+    """
+    Every handle candidate in default priority order (not yet capped), each with the
+    names of the patterns that produce it, e.g. ('mbvision_kw', ('joined+_cc',))
+    """
+    base_variations = [
+        ('joined', clean_name.replace(' ', '')),
+        ('underscored', clean_name.replace(' ', '_')),
+        ('dotted', clean_name.replace(' ', '.')),
+        ('no_apostrophe', clean_name.replace("'", '')),
+        ('joined_no_apostrophe', clean_name.replace("'", '').replace(' ', '')),
+        ('alnum', re.sub(r'[^a-zA-Z0-9]', '', clean_name)),
+    ]
+
+    # First letter of each word followed by the remaining words
+    words = clean_name.split()
+    if len(words) > 1:
+        abbreviation = ''.join(w[0] for w in words if w)
+        if len(abbreviation) >= 2:
+            remaining = ''.join(w for w in words[1:] if w)
+            if remaining:
+                base_variations.append(('initials', abbreviation + remaining))
+                base_variations.append(('initials_lower', abbreviation.lower() + remaining.lower()))
+
+    # Country code variations come first
+    variations = []
+    if code:
+        for pattern, base in base_variations:
+            if base:
+                variations.extend([(pattern + '+cc', base + code), (pattern + '+_cc', base + '_' + code),
+                                   (pattern + '+.cc', base + '.' + code)])
+    variations.extend(base_variations)
+
+    patterns = {}
+    for pattern, handle in variations:
+        if handle and len(handle) > 2:
+            patterns.setdefault(handle, []).append(pattern)
+    return tuple((handle, tuple(names)) for handle, names in patterns.items())
+
+
+def _domain_variations(business_name, code):
+    compact = business_name.lower().replace(' ', '').replace("'", '').replace('-', '')
+    compact = re.sub(r'[^a-zA-Z0-9]', '', compact)
+    for suffix in DOMAIN_SUFFIXES:
+        if compact.endswith(suffix):
+            compact = compact[:-len(suffix)]
+
+    domains = [f"{compact}.com", f"www.{compact}.com", f"{compact}.net", f"{compact}.org"]
+    if code:
+        domains.extend([f"{compact}{code}.com", f"{compact}-{code}.com", f"{compact}.{code}",
+                        f"www.{compact}{code}.com"])
+
+    # First word + last word (e.g. "mb vision" -> "mbvision")
+    words = business_name.lower().split()
+    if len(words) >= 2:
+        short_name = re.sub(r'[^a-zA-Z0-9]', '', words[0] + words[-1])
+        domains.extend([f"{short_name}.com", f"www.{short_name}.com"])
+        if code:
+            domains.extend([f"{short_name}{code}.com", f"{short_name}-{code}.com"])
+    return _unique(domains, MAX_DOMAINS)
+
+
+class NamePlan:
+    """The normalized inputs of a lookup and every candidate derived from them"""
+    __slots__ = ('business_name', 'country', 'country_code', 'clean_name', 'tokens',
+                 'handles', 'facebook_handles', 'all_handles', 'handle_patterns', 'domains')
+
+    def __init__(self, business_name, country):
+        self.business_name = business_name
+        self.country = country
+        self.country_code = country_code(country)
+
+        clean_name = business_name.lower()
+        for suffix in HANDLE_SUFFIXES:
+            if clean_name.endswith(suffix):
+                clean_name = clean_name[:-len(suffix)].strip()
+        self.clean_name = clean_name
+        self.tokens = tuple(clean_name.split())
+
+        variations = _handle_variations(clean_name, self.country_code)
+        # Every candidate (uncapped) and the patterns producing it, for probe ordering learned from past hits
+        self.all_handles = tuple(handle for handle, _ in variations)
+        self.handle_patterns = dict(variations)
+        self.handles = self.all_handles[:MAX_HANDLES]
+        # Facebook page names often carry the country code, so those go first
+        code = self.country_code
+        self.facebook_handles = (tuple(h for h in self.handles if code and code in h.lower())
+                                 + tuple(h for h in self.handles if not (code and code in h.lower())))
+        self.domains = _domain_variations(business_name, self.country_code)
+
+
+@lru_cache(maxsize=4096)
+def name_plan(business_name, country):
+    """The (memoized) NamePlan for a business name and country"""
+    return NamePlan(business_name, country or '')
@@ -0,0 +1,196 @@
+"""
+Hit rates of handle patterns, used to order the direct Instagram/Facebook probes.
+
+Each direct search records, per platform and country, that it ran and which
+handle patterns (see normalization.NamePlan.handle_patterns) produced the
+profile that verified. Once a platform/country has enough searches recorded,
+later probe lists put the patterns that hit most often first: probing in
+order of decreasing hit probability minimizes the expected number of probes
+before a hit. Countries with too few searches of their own use the totals of
+all countries. With PROBE_COVERAGE below 1 the list is also cut once the
+patterns covering that share of past hits are in it.
+
+Counts are stored in SQLite, shared by every process on the machine, and can
+be inspected at /api/probe-stats.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'social_finder_probe_stats.sqlite3')
+
+ALL_COUNTRIES = '*'
+
+
+class ProbeStats:
+    def __init__(self, path=DEFAULT_PATH, min_samples=20, coverage=1.0, min_probes=3, max_probes=20,
+                 refresh_interval=60.0):
+        self.path = path
+        self.min_samples = min_samples            # Searches needed before their stats reorder probes
+        self.coverage = coverage                  # Share of past hits the probe list must cover (1 = never cut)
+        self.min_probes = min_probes              # Probes always kept when cutting
+        self.max_probes = max_probes
+        self.refresh_interval = refresh_interval  # Seconds between reloads of counts written by other processes
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._searches = {}  # (platform, country) -> searches
+        self._hits = {}      # (platform, country) -> {pattern: hits}
+        self._last_refresh = 0.0
+        self._init_schema()
+        self._refresh(force=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the stats from PROBE_STATS_PATH, PROBE_STATS_MIN_SAMPLES and PROBE_COVERAGE,
+        or return None if they are disabled (PROBE_STATS_PATH set to an empty string)
+        """
+        path = os.getenv('PROBE_STATS_PATH', DEFAULT_PATH)
+        if not path:
+            return None
+        try:
+            return cls(
+                path,
+                min_samples=int(os.getenv('PROBE_STATS_MIN_SAMPLES', '20')),
+                coverage=float(os.getenv('PROBE_COVERAGE', '1.0'))
+            )
+        except sqlite3.Error as e:
+            print(f"Probe stats disabled, could not open {path}: {e}")
+            return None
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        # WAL lets readers in other processes proceed while one process writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS probe_searches (
+                platform TEXT NOT NULL,
+                country TEXT NOT NULL,
+                searches INTEGER NOT NULL,
+                PRIMARY KEY (platform, country)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS probe_hits (
+                platform TEXT NOT NULL,
+                country TEXT NOT NULL,
+                pattern TEXT NOT NULL,
+                hits INTEGER NOT NULL,
+                PRIMARY KEY (platform, country, pattern)
+            )
+        """)
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        try:
+            conn = self._connect()
+            search_rows = conn.execute('SELECT platform, country, searches FROM probe_searches').fetchall()
+            hit_rows = conn.execute('SELECT platform, country, pattern, hits FROM probe_hits').fetchall()
+        except sqlite3.Error as e:
+            print(f"Probe stats read error: {e}")
+            return
+        searches = {}
+        hits = {}
+        for platform, country, count in search_rows:
+            for key in ((platform, country), (platform, ALL_COUNTRIES)):
+                searches[key] = searches.get(key, 0) + count
+        for platform, country, pattern, count in hit_rows:
+            for key in ((platform, country), (platform, ALL_COUNTRIES)):
+                patterns = hits.setdefault(key, {})
+                patterns[pattern] = patterns.get(pattern, 0) + count
+        with self._lock:
+            self._searches = searches
+            self._hits = hits
+
+    def record(self, platform, country, patterns=()):
+        """Record a finished direct search and the patterns of the handle that verified (none if nothing did)"""
+        conn = None
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN')
+            conn.execute(
+                'INSERT INTO probe_searches (platform, country, searches) VALUES (?, ?, 1) '
+                'ON CONFLICT (platform, country) DO UPDATE SET searches = searches + 1',
+                (platform, country)
+            )
+            conn.executemany(
+                'INSERT INTO probe_hits (platform, country, pattern, hits) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT (platform, country, pattern) DO UPDATE SET hits = hits + 1',
+                [(platform, country, pattern) for pattern in patterns]
+            )
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn is not None and conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Probe stats write error: {e}")
+            return
+        with self._lock:
+            for key in ((platform, country), (platform, ALL_COUNTRIES)):
+                self._searches[key] = self._searches.get(key, 0) + 1
+                counts = self._hits.setdefault(key, {})
+                for pattern in patterns:
+                    counts[pattern] = counts.get(pattern, 0) + 1
+
+    def _counts(self, platform, country):
+        """Hits per pattern for the platform in this country, or in all countries if it has too few searches"""
+        self._refresh()
+        with self._lock:
+            for key in ((platform, country), (platform, ALL_COUNTRIES)):
+                if self._searches.get(key, 0) >= self.min_samples:
+                    return dict(self._hits.get(key, {}))
+        return None
+
+    def order(self, platform, country, candidates, patterns_of, default):
+        """
+        The handles to probe, most likely first. candidates: every handle in default
+        priority order; patterns_of: handle -> pattern names; default: the list used
+        while there are too few searches on record (returned unchanged then).
+        """
+        hits = self._counts(platform, country)
+        if not hits:
+            return list(default)
+
+        # Handles no pattern has hit with keep their default order, after the ones that have
+        rank = {handle: i for i, handle in enumerate(default)}
+        fallback = len(rank)
+        best = {handle: max((hits.get(pattern, 0) for pattern in patterns_of.get(handle, ())), default=0)
+                for handle in candidates}
+        ordered = sorted(candidates, key=lambda handle: (-best[handle], rank.get(handle, fallback)))
+        ordered = [handle for handle in ordered if handle in rank or best[handle]][:self.max_probes]
+
+        if self.coverage >= 1:
+            return ordered
+        total = sum(hits.values())
+        covered = set()
+        for count, handle in enumerate(ordered, 1):
+            covered.update(patterns_of.get(handle, ()))
+            if count >= self.min_probes and sum(hits.get(p, 0) for p in covered) >= self.coverage * total:
+                return ordered[:count]
+        return ordered
+
+    def stats(self):
+        """{platform: {country: {'searches', 'patterns': {pattern: {'hits', 'rate'}}}}}, '*' being all countries"""
+        self._refresh()
+        with self._lock:
+            report = {}
+            for (platform, country), searches in sorted(self._searches.items()):
+                hits = self._hits.get((platform, country), {})
+                report.setdefault(platform, {})[country] = {
+                    'searches': searches,
+                    'patterns': {pattern: {'hits': count, 'rate': round(count / searches, 3)}
+                                 for pattern, count in sorted(hits.items(), key=lambda item: -item[1])}
+                }
+            return report
@@ -0,0 +1,144 @@
+"""
+Persistent cache of lookup results.
+
+Results are stored in SQLite so they survive restarts and can be shared by
+every worker process on the same machine. Entries expire after a TTL that
+depends on the confidence of the result, and the least recently used entries
+are evicted once the cache grows past its size cap.
+"""
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'social_finder_results.sqlite3')
+
+# Seconds a result stays fresh, by confidence level
+DEFAULT_TTLS = {
+    'high': 7 * 24 * 3600,
+    'medium': 24 * 3600,
+    'low': 3600,
+}
+
+
+def normalize_key(business_name, country):
+    """Build the cache key for a (business_name, country) pair"""
+    parts = []
+    for value in (business_name, country):
+        value = (value or '').casefold().replace('’', "'")
+        value = re.sub(r"[^\w\s]", '', value)
+        parts.append(' '.join(value.split()))
+    return '|'.join(parts)
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=10000, ttls=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        self._init_schema()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a cache from environment variables, or return None if it is disabled
+        (RESULT_CACHE_PATH set to an empty string)
+        """
+        path = os.getenv('RESULT_CACHE_PATH', DEFAULT_PATH)
+        if not path:
+            return None
+        ttls = {}
+        for confidence in DEFAULT_TTLS:
+            value = os.getenv(f'RESULT_CACHE_TTL_{confidence.upper()}')
+            if value:
+                ttls[confidence] = int(value)
+        max_entries = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '10000'))
+        try:
+            return cls(path, max_entries=max_entries, ttls=ttls)
+        except sqlite3.Error as e:
+            print(f"Result cache disabled, could not open {path}: {e}")
+            return None
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        # WAL lets readers in other processes proceed while one process writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+
+    def get(self, business_name, country):
+        """Return the cached results for a business, or None on a miss or expired entry"""
+        key = normalize_key(business_name, country)
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT result, expires_at FROM results WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (now, key))
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Result cache read error: {e}")
+            return None
+
+    def set(self, business_name, country, results):
+        """Store results for a business with a TTL chosen by its confidence"""
+        key = normalize_key(business_name, country)
+        now = time.time()
+        ttl = self.ttls.get(results.get('confidence'), self.ttls['low'])
+        # Per-lookup statistics and timings describe one run and are not worth keeping
+        stored = {k: v for k, v in results.items() if k not in ('stats', 'timings')}
+        try:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, result, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(stored), now + ttl, now)
+            )
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Result cache write error: {e}")
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then the least recently used ones above the size cap"""
+        count = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        conn.execute('DELETE FROM results WHERE expires_at <= ?', (now,))
+        excess = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)',
+                (excess,)
+            )
+
+    def clear(self):
+        try:
+            self._connect().execute('DELETE FROM results')
+        except sqlite3.Error as e:
+            print(f"Result cache clear error: {e}")
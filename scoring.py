@@ -0,0 +1,124 @@
+"""
+Scoring of candidate profile and website links against a business name.
+
+A NameProfile holds the business name's tokens and character trigrams,
+built once per name and reused for every candidate of a lookup. Candidates
+are scored from two pieces of evidence: how closely the URL's handle (or
+domain) matches the name, and how much of the name appears in the page
+title. Both are set operations, so scoring a batch of candidates stays
+cheap even for long titles.
+"""
+import re
+from functools import lru_cache
+
+# Apostrophes are dropped so "McDonald's" and "mcdonalds" compare equal
+_APOSTROPHE_RE = re.compile(r"['’`]")
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+_PROFILE_HANDLE_RE = re.compile(r'(?:instagram|facebook)\.com/([a-z0-9_.]+)')
+_HOST_RE = re.compile(r'https?://(?:www\.)?([^/?#:]+)')
+_OG_TITLE_RE = re.compile(r'<meta[^>]*property=["\']og:title["\'][^>]*content=["\']([^"\']+)["\']', re.IGNORECASE)
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]+)</title>', re.IGNORECASE)
+
+# Weight of the stronger and the weaker piece of evidence in a candidate's score
+STRONG_WEIGHT = 0.75
+WEAK_WEIGHT = 0.25
+
+
+def normalize(text):
+    """Lowercase text with apostrophes removed and every other separator turned into one space"""
+    return _SEPARATOR_RE.sub(' ', _APOSTROPHE_RE.sub('', text.lower())).strip()
+
+
+def trigrams(compact):
+    """Character trigrams of a compacted (space-free) name; names under 3 characters are their own gram"""
+    if len(compact) < 3:
+        return frozenset([compact]) if compact else frozenset()
+    return frozenset(compact[i:i + 3] for i in range(len(compact) - 2))
+
+
+def similarity(a, b):
+    """Dice coefficient of the character trigrams of two strings, between 0 and 1"""
+    grams_a = trigrams(normalize(a).replace(' ', ''))
+    grams_b = trigrams(normalize(b).replace(' ', ''))
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class NameProfile:
+    """Precomputed tokens and trigrams of a business name"""
+    __slots__ = ('tokens', 'compact', 'grams')
+
+    def __init__(self, business_name):
+        text = normalize(business_name)
+        self.tokens = frozenset(token for token in text.split() if len(token) > 1)
+        self.compact = text.replace(' ', '')
+        self.grams = trigrams(self.compact)
+
+    def handle_match(self, handle):
+        """How closely a handle or domain label matches the name, between 0 and 1"""
+        compact = normalize(handle).replace(' ', '')
+        if not compact or not self.compact:
+            return 0.0
+        shorter, longer = sorted((compact, self.compact), key=len)
+        if len(shorter) >= 3 and shorter in longer:
+            # e.g. mcdonaldskw for McDonald's: containment, discounted for the extra characters
+            return 0.7 + 0.3 * len(shorter) / len(longer)
+        grams = trigrams(compact)
+        return 2 * len(self.grams & grams) / (len(self.grams) + len(grams))
+
+    def text_match(self, text):
+        """How much of the name appears in a text such as a page title, between 0 and 1"""
+        if not text or not self.grams:
+            return 0.0
+        normalized = normalize(text)
+        compact = normalized.replace(' ', '')
+        if self.compact in compact:
+            return 1.0
+        token_coverage = len(self.tokens & set(normalized.split())) / len(self.tokens) if self.tokens else 0.0
+        gram_coverage = len(self.grams & trigrams(compact)) / len(self.grams)
+        return max(token_coverage, gram_coverage)
+
+
+@lru_cache(maxsize=1024)
+def name_profile(business_name):
+    """The NameProfile for a business name, built once and shared by every candidate of the lookup"""
+    return NameProfile(business_name)
+
+
+def url_handle(url):
+    """The part of a candidate URL that names the business: profile handle or first domain label"""
+    lowered = url.lower()
+    match = _PROFILE_HANDLE_RE.search(lowered)
+    if match:
+        return match.group(1)
+    match = _HOST_RE.match(lowered)
+    return match.group(1).split('.')[0] if match else ''
+
+
+def page_title(html):
+    """og:title, else <title>, of an HTML page, or None"""
+    match = _OG_TITLE_RE.search(html) or _TITLE_RE.search(html)
+    return match.group(1).strip() if match else None
+
+
+def candidate_score(profile, url, title=None):
+    """Score a verified candidate between 0 and 1 from its URL handle and page title"""
+    handle_score = profile.handle_match(url_handle(url))
+    title_score = profile.text_match(title) if title else 0.0
+    strong, weak = max(handle_score, title_score), min(handle_score, title_score)
+    return round(STRONG_WEIGHT * strong + WEAK_WEIGHT * weak, 3)
+
+
+def pick_best(candidates, scores, min_score=0.0):
+    """
+    The highest scoring candidate; on a tie the one earlier in candidates wins.
+    None if no candidate scores at least min_score.
+    """
+    best = None
+    for candidate in candidates:
+        if candidate in scores and (best is None or scores[candidate] > scores[best]):
+            best = candidate
+    if best is None or scores[best] < min_score:
+        return None
+    return best
@@ -0,0 +1,97 @@
+"""
+Coalescing of concurrent identical work.
+
+While a call for a key is running, further calls for the same key wait for
+it and share its result (or exception) instead of repeating the work. Only
+calls that overlap are coalesced; nothing is remembered once a call ends, so
+this complements the caches rather than replacing them.
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces overlapping calls made from different threads"""
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """
+        Return (func() result, shared). shared is True when the result came from
+        a call another thread already had in flight for key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                call = self._calls[key] = _Call()
+        if shared:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces overlapping coroutine calls on one event loop. The shared work runs
+    as its own task, so a caller giving up (cancelled) does not cancel it for the
+    others; it is cancelled only once every caller has given up.
+    """
+    def __init__(self):
+        self._calls = {}  # key -> [task, waiters]
+        self.coalesced = 0
+
+    async def do(self, key, coro_func):
+        """Return (result, shared) like SingleFlight.do, for a coroutine function"""
+        import asyncio
+        entry = self._calls.get(key)
+        shared = entry is not None
+        if shared:
+            self.coalesced += 1
+            entry[1] += 1
+        else:
+            task = asyncio.ensure_future(coro_func())
+            entry = self._calls[key] = [task, 1]
+            task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+
+        task = entry[0]
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+            raise
+
+    def _forget(self, key, entry):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
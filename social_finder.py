@@ -0,0 +1,1329 @@
+"""
+The lookup engine behind the Flask app: SocialMediaFinder and the per-lookup
+state it shares with AsyncSocialMediaFinder (LookupContext, FetchedPage, the
+time budget and the stage/request metrics helpers).
+
+It is kept apart from app.py so async_finder.py can import it without
+importing the Flask app, which also lets `python app.py` build the asyncio
+engine without a circular import.
+"""
+import requests
+import re
+import json
+import codecs
+from urllib.parse import quote, urlparse
+import time
+import os
+import threading
+import contextvars
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
+from throttle import RateLimiter, HostRateLimiter
+from transport import HTTPTransport
+from singleflight import SingleFlight
+from cse_quota import CSEKeyPool, QUOTA_EXCEEDED, RATE_LIMITED
+from dns_cache import DNSCache
+from probe_stats import ProbeStats
+from negative_cache import NegativeCache, NOT_FOUND, ERROR_PAGE, DNS_FAILURE, is_dns_failure
+from extraction import extract_links, is_likely_website
+from normalization import name_plan, country_code
+from scoring import name_profile, candidate_score, page_title, pick_best, similarity
+from metrics import STAGE_SECONDS, OUTBOUND_REQUESTS, CACHE_EVENTS, FALLBACK_EVENTS, LOOKUPS, COALESCED
+
+# State of the lookup running in the current context (see LookupContext)
+_current_lookup = contextvars.ContextVar('current_lookup', default=None)
+
+class FetchMemo:
+    """
+    Per-lookup memo of HTTP responses so each URL (including redirect targets)
+    is fetched at most once while a single business is being looked up
+    """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.saved = 0
+    
+    def get(self, key):
+        """Return the memoized response or exception for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.saved += 1
+            return entry
+    
+    def store(self, key, entry, aliases=()):
+        """Memoize a response/page (or the exception it raised) under key and its redirect URLs"""
+        with self._lock:
+            self.fetches += 1
+            self._entries[key] = entry
+            for alias in aliases:
+                self._entries.setdefault(alias, entry)
+    
+    def stats(self):
+        with self._lock:
+            return {'fetches': self.fetches, 'fetches_saved': self.saved}
+
+# Share of a lookup's time budget the discovery methods may use; the rest is kept
+# for verifying what they found
+METHOD_BUDGET_SHARE = 0.8
+# Seconds past a deadline allowed for work that needs no more network to finish:
+# methods returning what they verified, verification of pages already in the memo
+BUDGET_GRACE_SECONDS = 0.2
+
+class BudgetExceeded(Exception):
+    """The lookup's time budget (timeout_ms) ran out before a request could be sent or finished"""
+
+class LookupContext:
+    """
+    State shared by everything that runs on behalf of one lookup: the response memo,
+    counters, stage timings and, for lookups with a time budget, its deadline
+    """
+    def __init__(self, memo=None, deadline=None):
+        self.memo = memo if memo is not None else FetchMemo()
+        self.counters = {}
+        self.timings = {}  # stage -> [calls, total seconds, max seconds]
+        self.deadline = deadline  # time.monotonic() value the lookup must finish by, or None
+        self.methods_deadline = None  # When unfinished discovery methods are abandoned (set by _run_methods)
+        self.stages = {}  # stage -> 'skipped' or 'incomplete', for stages the deadline cut short
+        self._lock = threading.Lock()
+    
+    def remaining(self):
+        """Seconds left in the time budget, or None without one"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+    
+    def methods_remaining(self):
+        """Seconds left before the discovery methods are abandoned, or None outside of them"""
+        return None if self.methods_deadline is None else self.methods_deadline - time.monotonic()
+    
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def mark_stage(self, stage, state):
+        """Record that a stage was 'skipped' (none of its work done) or 'incomplete' (cut short)"""
+        with self._lock:
+            self.stages[stage] = state
+    
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def record_timing(self, stage, seconds):
+        with self._lock:
+            timing = self.timings.setdefault(stage, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+    
+    def stats(self):
+        with self._lock:
+            return {**self.memo.stats(), **self.counters}
+    
+    def stage_report(self):
+        with self._lock:
+            return dict(self.stages)
+    
+    def timing_stats(self):
+        """{stage: {'calls', 'total_ms', 'max_ms'}} for the response's timings block"""
+        with self._lock:
+            return {stage: {'calls': calls, 'total_ms': round(total * 1000, 1), 'max_ms': round(longest * 1000, 1)}
+                    for stage, (calls, total, longest) in self.timings.items()}
+
+def record_stage(stage, seconds):
+    """Add a stage's duration to the latency histogram and to the current lookup's timings"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    lookup = _current_lookup.get()
+    if lookup is not None:
+        lookup.record_timing(stage, seconds)
+
+def timed_stage(stage):
+    """Decorator recording each call of a function (or coroutine function) as a lookup stage"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_stage(stage, time.perf_counter() - start)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_stage(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# Hosts named in the outbound request metric; guessed business domains are counted as "other"
+# so the number of series stays bounded
+METRIC_HOSTS = frozenset([
+    'www.google.com', 'www.googleapis.com', 'www.instagram.com', 'instagram.com',
+    'www.facebook.com', 'facebook.com', 'm.facebook.com',
+])
+
+def record_request(url, status):
+    """Count an outbound request by host and status ('error' when it raised)"""
+    host = urlparse(url).hostname or ''
+    OUTBOUND_REQUESTS.inc(host=host if host in METRIC_HOSTS else 'other', status=status)
+
+class FetchedPage:
+    """
+    The parts of an HTTP response the verifiers look at. text may be
+    truncated when the body was streamed (see SocialMediaFinder._fetch_page)
+    """
+    def __init__(self, status_code, url, text='', history=(), truncated=False):
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+        self.history = list(history)  # URLs of the redirects that led here
+        self.truncated = truncated
+    
+    def json(self):
+        return json.loads(self.text)
+
+CSE_URL = "https://www.googleapis.com/customsearch/v1"
+
+# Page content that shows an Instagram profile doesn't exist
+INSTAGRAM_ERROR_INDICATORS = [
+    'page not found',
+    'sorry, this page',
+    'user not found',
+    'this page is not available'
+]
+
+# Page content that shows a Facebook page doesn't exist
+FACEBOOK_ERROR_INDICATORS = [
+    'page not found',
+    'content not available',
+    'this content is not available',
+    'sorry, this page',
+    'this page isn\'t available',
+    'the link you followed may be broken',
+    'this page may have been removed',
+    'no longer available'
+]
+
+# Characters at the start of a website that are checked for error page text
+WEBSITE_ERROR_SAMPLE_SIZE = 5000
+
+# Username / page name in a profile URL
+INSTAGRAM_PATH_RE = re.compile(r'instagram\.com/([a-zA-Z0-9_.]+)', re.IGNORECASE)
+FACEBOOK_PATH_RE = re.compile(r'facebook\.com/([a-zA-Z0-9_.]+)', re.IGNORECASE)
+
+class SocialMediaFinder:
+    def __init__(self, google_api_key=None, google_cse_id=None, negative_cache=None, cse_keys=None, dns_cache=None,
+                 probe_stats=None):
+        # Pooled, retrying transport with a session per thread (see transport.py)
+        self.session = HTTPTransport.from_env({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        })
+        # Seconds to establish a connection and to wait between bytes of a response
+        self.connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+        self.read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+        self.google_api_key = google_api_key or os.getenv('GOOGLE_API_KEY')
+        self.google_cse_id = google_cse_id or os.getenv('GOOGLE_CSE_ID')
+        # Custom Search key pairs (this one plus GOOGLE_API_KEYS) and their quota state
+        self.cse_keys = cse_keys if cse_keys is not None else CSEKeyPool.from_env(self.google_api_key, self.google_cse_id)
+        # Number of handle variations probed concurrently by the direct searches
+        self.probe_workers = max(1, int(os.getenv('PROBE_WORKERS', '8')))
+        # Seconds the discovery methods of one lookup may run before unfinished ones are dropped
+        self.lookup_deadline = float(os.getenv('LOOKUP_DEADLINE_SECONDS', '45'))
+        # Custom Search queries per second across every lookup on this finder
+        self.cse_rate_limiter = RateLimiter(float(os.getenv('CSE_QPS', '5')))
+        # Optional per-host request rates, e.g. HOST_RATE_LIMITS="www.google.com=0.5,instagram.com=5"
+        self.host_rate_limiter = HostRateLimiter.from_spec(os.getenv('HOST_RATE_LIMITS', ''))
+        # Most bytes of a page body read when verifying a candidate
+        self.verify_max_bytes = int(os.getenv('VERIFY_MAX_BYTES', '262144'))
+        # A candidate scoring at least this well is accepted without waiting for the others
+        self.score_accept = float(os.getenv('SCORE_ACCEPT_THRESHOLD', '0.85'))
+        # A verified candidate scoring below this doesn't name the business and is never returned
+        self.score_min = float(os.getenv('SCORE_MIN_THRESHOLD', '0.3'))
+        # Candidate URLs recently found dead, shared by every lookup on this finder
+        self.negative_cache = negative_cache if negative_cache is not None else NegativeCache.from_env()
+        # Resolves guessed website hosts before probing them (None when pre-resolution is off)
+        self.dns_cache = dns_cache if dns_cache is not None else DNSCache.from_env()
+        # Which handle patterns verified in past direct searches; orders the probes (None when disabled)
+        self.probe_stats = probe_stats if probe_stats is not None else ProbeStats.from_env()
+        # Identical fetches in flight at the same time (from any lookup) share one request
+        self.fetch_flight = SingleFlight()
+    
+    def _similarity(self, a, b):
+        """Calculate similarity between two strings"""
+        return similarity(a, b)
+    
+    def _fetch(self, url, params=None):
+        """
+        GET a URL (reading the whole body) through the current lookup's response memo.
+        Outside of a lookup this is a plain session request.
+        """
+        def request():
+            self.host_rate_limiter.acquire(url)
+            try:
+                response = self.session.get(url, params=params, timeout=self._request_timeout(), allow_redirects=True)
+            except requests.exceptions.RequestException as e:
+                record_request(url, 'error')
+                self._raise_if_over_budget(e)
+                raise
+            record_request(url, response.status_code)
+            return response
+        return self._memoized_get(url, params, request)
+    
+    def _fetch_page(self, url, done=None):
+        """
+        GET a candidate page for verification, streaming the body only as far as
+        it matters: non-200 bodies are not read at all, and reading stops after
+        verify_max_bytes or as soon as done(lowercased text so far) is true.
+        Returns a FetchedPage.
+        """
+        def request():
+            self.host_rate_limiter.acquire(url)
+            try:
+                response = self.session.get(url, timeout=self._request_timeout(), allow_redirects=True, stream=True)
+            except requests.exceptions.RequestException as e:
+                record_request(url, 'error')
+                self._raise_if_over_budget(e)
+                raise
+            record_request(url, response.status_code)
+            return self._read_page(response, done)
+        return self._memoized_get(url, None, request, streamed=True)
+    
+    def _budget_remaining(self):
+        """Seconds left in the current lookup's time budget, or None when it has none"""
+        lookup = _current_lookup.get()
+        return lookup.remaining() if lookup is not None else None
+    
+    def _budget_expired(self):
+        lookup = _current_lookup.get()
+        return lookup is not None and lookup.expired()
+    
+    def _methods_remaining(self):
+        """Seconds before the current lookup abandons its discovery methods, or None"""
+        lookup = _current_lookup.get()
+        return lookup.methods_remaining() if lookup is not None else None
+    
+    def _raise_if_over_budget(self, cause=None):
+        """Raise BudgetExceeded (from cause, e.g. the timeout it caused) once the lookup's budget has run out"""
+        if self._budget_expired():
+            raise BudgetExceeded('lookup time budget exceeded') from cause
+    
+    def _request_timeout(self):
+        """(connect, read) timeouts for a request, shortened to what is left of the lookup's budget"""
+        remaining = self._budget_remaining()
+        if remaining is None:
+            return (self.connect_timeout, self.read_timeout)
+        if remaining <= 0:
+            raise BudgetExceeded('lookup time budget exceeded')
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+    
+    def _sleep(self, seconds, cancel=None):
+        """Pause between requests, but not past the end of the lookup's budget or once cancel is set"""
+        remaining = self._budget_remaining()
+        duration = seconds if remaining is None else max(0.0, min(seconds, remaining))
+        if cancel is not None:
+            cancel.wait(duration)
+        else:
+            time.sleep(duration)
+    
+    def _read_page(self, response, done):
+        page = FetchedPage(response.status_code, response.url, history=[r.url for r in response.history])
+        try:
+            if response.status_code != 200:
+                # Closing here drops the connection instead of downloading a body nobody reads
+                return page
+            
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            parts = []
+            lowered = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=16384):
+                self._raise_if_over_budget()
+                if size + len(chunk) > self.verify_max_bytes:
+                    chunk = chunk[:self.verify_max_bytes - size]
+                    page.truncated = True
+                size += len(chunk)
+                text = decoder.decode(chunk)
+                parts.append(text)
+                lowered.append(text.lower())
+                if page.truncated:
+                    break
+                if done and done(''.join(lowered)):
+                    page.truncated = True
+                    break
+            page.text = ''.join(parts)
+            return page
+        finally:
+            response.close()
+    
+    def _memoized_get(self, url, params, request, streamed=False):
+        """
+        Run request() unless the current lookup already fetched this URL. Concurrent
+        fetches of the same URL, within a lookup or across lookups, share one request.
+        """
+        key = requests.Request('GET', url, params=params).prepare().url
+        lookup = _current_lookup.get()
+        if lookup is None:
+            return self._coalesced_get(key, streamed, request)
+        
+        memo = lookup.memo
+        entry = memo.get(key)
+        if entry is None:
+            try:
+                entry = self._coalesced_get(key, streamed, request)
+            except requests.exceptions.RequestException as e:
+                entry = e
+                memo.store(key, entry)
+            else:
+                redirects = [getattr(r, 'url', r) for r in entry.history]
+                memo.store(key, entry, redirects + [entry.url])
+        
+        if isinstance(entry, Exception):
+            raise entry
+        return entry
+    
+    def _coalesced_get(self, key, streamed, request):
+        # Streamed pages and full responses are different objects, so they don't share a flight
+        try:
+            result, shared = self.fetch_flight.do((key, streamed), request)
+        except BudgetExceeded:
+            # The fetch was another lookup's and its budget ran out; this one may still have time
+            self._raise_if_over_budget()
+            return request()
+        if shared:
+            COALESCED.inc(level='fetch')
+            self._count('fetches_coalesced')
+        return result
+    
+    def find_social_links(self, business_name, country, timeout=None):
+        """
+        Find Instagram and Facebook links for a business using multiple methods.
+        timeout (seconds) is a budget for the whole lookup: requests still outstanding
+        when it runs out are abandoned and the links verified so far are returned, with
+        the stages that were cut short listed in results['stages'].
+        """
+        lookup = LookupContext(deadline=time.monotonic() + timeout if timeout else None)
+        token = _current_lookup.set(lookup)
+        start = time.perf_counter()
+        try:
+            results = self._find_social_links(business_name, country)
+        finally:
+            record_stage('lookup', time.perf_counter() - start)
+            _current_lookup.reset(token)
+        
+        return self._finish_lookup(results, lookup)
+    
+    def _finish_lookup(self, results, lookup):
+        """Attach the lookup's stats and timings to its results and update the process metrics"""
+        results['stats'] = lookup.stats()
+        results['timings'] = lookup.timing_stats()
+        results['stages'] = lookup.stage_report()
+        results['partial'] = bool(results['stages'])
+        LOOKUPS.inc(confidence=results['confidence'])
+        CACHE_EVENTS.inc(results['stats']['fetches_saved'], cache='fetch_memo', result='hit')
+        CACHE_EVENTS.inc(results['stats']['fetches'], cache='fetch_memo', result='miss')
+        return results
+    
+    def _count(self, name, amount=1):
+        """Add to a counter reported in the current lookup's stats"""
+        lookup = _current_lookup.get()
+        if lookup is not None:
+            lookup.count(name, amount)
+    
+    def _mark_stage(self, stage, state):
+        """Report a stage of the current lookup as 'skipped' or 'incomplete' in its results"""
+        lookup = _current_lookup.get()
+        if lookup is not None:
+            lookup.mark_stage(stage, state)
+    
+    def _fallback_event(self, event):
+        """Record an event that pushed the lookup onto a fallback path (quota exceeded, deadline, ...)"""
+        self._count(event)
+        FALLBACK_EVENTS.inc(event=event)
+    
+    def _find_social_links(self, business_name, country):
+        results = self._new_results()
+        outcomes = self._run_methods(business_name, country)
+        candidates = self._merge_method_results(results, outcomes)
+        
+        # Method 5: Verify and score the candidates, keeping the best match per platform
+        # Direct search results go first, so they win ties
+        instagram_prioritized = self._prioritize_candidates(candidates['instagram'], results['sources'], outcomes.get('instagram_direct'))
+        facebook_prioritized = self._prioritize_candidates(candidates['facebook'], results['sources'], outcomes.get('facebook_direct'))
+        
+        results['scores'] = {}
+        for kind, prioritized in (('instagram', instagram_prioritized),
+                                  ('facebook', facebook_prioritized),
+                                  ('website', candidates['website'])):
+            results[kind], results['scores'][kind] = self._best_scored(kind, prioritized, business_name)
+        
+        self._set_confidence(results)
+        return results
+    
+    def _run_methods(self, business_name, country):
+        """
+        Run the discovery methods concurrently under a shared deadline and
+        return {method name: result} for the methods that finished in time.
+        
+        Method 2 (Google Web Search) is only needed when the Custom Search API
+        left gaps, so it starts speculatively and is stopped once the API's
+        answer shows it isn't needed.
+        """
+        methods = {}
+        # Method 1: Google Custom Search API (if available)
+        if self.cse_keys:
+            methods['google_api'] = self._search_google_api
+        # Method 2: Google Web Search (fallback); stops before its next query once cancelled
+        cancel_web_search = threading.Event()
+        methods['google_web'] = functools.partial(self._search_google, cancel=cancel_web_search)
+        # Method 3: Direct Instagram/Facebook search with variations
+        # Always try direct search as it can find more accurate results
+        methods['instagram_direct'] = self._search_instagram_direct
+        methods['facebook_direct'] = self._search_facebook_direct
+        # Method 4: Search for official website
+        methods['website'] = self._search_website
+        
+        deadline = self._methods_deadline(time.monotonic())
+        if deadline is None:
+            for name in methods:
+                self._mark_stage(name, 'skipped')
+            return {}
+        lookup = _current_lookup.get()
+        if lookup is not None:
+            lookup.methods_deadline = deadline
+        outcomes = {}
+        executor = ThreadPoolExecutor(max_workers=len(methods))
+        try:
+            # Each method runs in a copy of the caller's context so it shares the lookup's memo
+            futures = {executor.submit(contextvars.copy_context().run, method, business_name, country): name
+                       for name, method in methods.items()}
+            pending = set(futures)
+            while pending:
+                # Methods hand over what they verified at the deadline itself, so allow them a moment
+                remaining = deadline + BUDGET_GRACE_SECONDS - time.monotonic()
+                if remaining <= 0:
+                    print(f"Lookup deadline reached, unfinished methods: {sorted(futures[f] for f in pending)}")
+                    self._fallback_event('deadline_exceeded')
+                    for future in pending:
+                        self._mark_stage(futures[future], 'incomplete')
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        outcomes[futures[future]] = future.result()
+                    except Exception as e:
+                        print(f"{futures[future]} search error: {e}")
+                        outcomes[futures[future]] = None
+                
+                # Settle the speculative web search as soon as the API has answered
+                if 'google_api' in outcomes and not self._web_search_needed(outcomes['google_api']):
+                    cancel_web_search.set()
+                    outcomes.pop('google_web', None)
+                    pending = {f for f in pending if futures[f] != 'google_web'}
+        finally:
+            # Methods still running past the deadline finish in the background, except the
+            # web search: nobody reads its results, and each query risks a Google block
+            cancel_web_search.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if 'google_api' in outcomes and not self._web_search_needed(outcomes['google_api']):
+            outcomes.pop('google_web', None)
+        return outcomes
+    
+    def _methods_deadline(self, now):
+        """
+        The time.monotonic() value the discovery methods must finish by: LOOKUP_DEADLINE_SECONDS
+        from now, or sooner when the lookup's budget ends first. None when the budget is already spent.
+        """
+        deadline = now + self.lookup_deadline
+        remaining = self._budget_remaining()
+        if remaining is None:
+            return deadline
+        if remaining <= 0:
+            return None
+        return min(deadline, now + remaining * METHOD_BUDGET_SHARE)
+    
+    def _web_search_needed(self, api_results):
+        """
+        Method 2 runs when the API returned None (e.g. quota exceeded, will use fallback)
+        or didn't find both social links
+        """
+        return not api_results or not api_results.get('instagram') or not api_results.get('facebook')
+    
+    def _merge_method_results(self, results, outcomes):
+        """Build the candidate lists from the methods' results in priority order, recording sources"""
+        candidates = {'instagram': [], 'facebook': [], 'website': []}
+        
+        api_results = outcomes.get('google_api')
+        if api_results:
+            results['sources'].append('Google Custom Search API')
+            self._add_search_candidates(candidates, api_results)
+        
+        google_results = outcomes.get('google_web')
+        if 'google_web' in outcomes and self.cse_keys:
+            # The web search is only kept when the API's answer left gaps
+            self._fallback_event('web_search_fallback')
+        if google_results:
+            if 'Google Custom Search API' not in results['sources']:
+                results['sources'].append('Google Web Search')
+            self._add_search_candidates(candidates, google_results)
+        
+        self._add_direct_candidates(results, candidates, outcomes.get('instagram_direct'),
+                                    outcomes.get('facebook_direct'), outcomes.get('website'))
+        return candidates
+    
+    def _new_results(self):
+        return {
+            'instagram': None,
+            'facebook': None,
+            'website': None,
+            'confidence': 'low',
+            'sources': []
+        }
+    
+    def _add_search_candidates(self, candidates, found):
+        """Add the links found by a search method to the candidate lists"""
+        for kind in ('instagram', 'facebook', 'website'):
+            if found.get(kind):
+                candidates[kind].append(found[kind])
+    
+    def _add_direct_candidates(self, results, candidates, instagram_link, facebook_link, website_link):
+        """Add the links found by the direct searches (Methods 3 and 4) and record their sources"""
+        if instagram_link and instagram_link not in candidates['instagram']:
+            candidates['instagram'].append(instagram_link)
+            if 'Instagram Direct Search' not in results['sources']:
+                results['sources'].append('Instagram Direct Search')
+        
+        if facebook_link and facebook_link not in candidates['facebook']:
+            candidates['facebook'].append(facebook_link)
+            if 'Facebook Direct Search' not in results['sources']:
+                results['sources'].append('Facebook Direct Search')
+        
+        if website_link:
+            candidates['website'].append(website_link)
+            if 'Website Search' not in results['sources']:
+                results['sources'].append('Website Search')
+    
+    def _prioritize_candidates(self, candidates, sources, direct_link):
+        """Order candidates for verification: direct search results first, then others"""
+        direct = [c for c in candidates if 'Direct Search' in str(c) or any('Direct Search' in s for s in sources)]
+        others = [c for c in candidates if c not in direct]
+        prioritized = direct + others
+        if direct_link:
+            prioritized.insert(0, direct_link)
+        return prioritized
+    
+    def _verifier(self, kind):
+        """(verify function, read_done predicate) for a kind of candidate"""
+        return {
+            'instagram': (self._verify_instagram_link, self._instagram_read_done),
+            'facebook': (self._verify_facebook_link, self._facebook_read_done),
+            'website': (self._verify_website_link, self._website_read_done),
+        }[kind]
+    
+    def _best_scored(self, kind, candidates, business_name):
+        """
+        Verify candidates concurrently and score each one that verifies against the business name.
+        Returns (best candidate or None, {candidate: score}); the best is None when it scores
+        below score_min. Once a candidate scores at least score_accept, the others still being
+        checked are dropped.
+        """
+        candidates = list(dict.fromkeys(candidates))
+        scores = {}
+        if not candidates:
+            return None, scores
+        
+        remaining = self._budget_remaining()
+        timeout = None if remaining is None else max(0.0, remaining) + BUDGET_GRACE_SECONDS
+        decided = 0
+        cut_short = False
+        executor = ThreadPoolExecutor(max_workers=min(self.probe_workers, len(candidates)))
+        try:
+            # Each check runs in a copy of the caller's context so it shares the lookup's memo
+            futures = {executor.submit(contextvars.copy_context().run, self._score_candidate, kind, candidate, business_name): candidate
+                       for candidate in candidates}
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    score = future.result()
+                except BudgetExceeded:
+                    cut_short = True
+                    continue
+                except Exception as e:
+                    print(f"{kind} scoring error: {e}")
+                    score = None
+                decided += 1
+                if score is not None:
+                    scores[futures[future]] = score
+                    if score >= self.score_accept:
+                        break
+        except FuturesTimeout:
+            cut_short = True
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if cut_short and not any(score >= self.score_accept for score in scores.values()):
+            self._mark_stage(f'verify_{kind}', 'incomplete' if decided else 'skipped')
+        return pick_best(candidates, scores, self.score_min), scores
+    
+    def _score_candidate(self, kind, url, business_name):
+        """Score a candidate between 0 and 1, or None if it doesn't verify"""
+        verify, read_done = self._verifier(kind)
+        if not verify(url, business_name):
+            return None
+        
+        # The page is already in the lookup's memo from verification
+        try:
+            page = self._fetch_page(url, read_done)
+            title = page_title(page.text) if page.status_code == 200 else None
+        except Exception:
+            title = None  # e.g. Facebook pages that verify on network errors
+        return candidate_score(name_profile(business_name), url, title)
+    
+    def _set_confidence(self, results):
+        """Determine confidence level from the number of accepted links (verified and scoring at least score_min)"""
+        verified_count = sum([
+            bool(results['instagram']),
+            bool(results['facebook']),
+            bool(results['website'])
+        ])
+        
+        if verified_count >= 2:
+            results['confidence'] = 'high'
+        elif verified_count == 1:
+            results['confidence'] = 'medium'
+        else:
+            results['confidence'] = 'low'
+    
+    @timed_stage('google_api')
+    def _search_google_api(self, business_name, country):
+        """
+        Search using Google Custom Search API (more reliable)
+        Queries are sent in waves; each wave only carries queries for link types
+        still missing, and the search stops once every type has been found.
+        """
+        credentials = self.cse_keys.acquire()
+        if credentials is None:
+            # Every key is out of quota - skip the API until it resets
+            self._fallback_event('cse_skipped')
+            return None
+        
+        found = {}
+        waves = self._cse_query_waves(business_name, country)
+        
+        try:
+            wave_index = 0
+            while wave_index < len(waves):
+                queries = [(query, collect) for query, kinds, collect in waves[wave_index]
+                           if any(not found.get(kind) for kind in kinds)]
+                if not queries:
+                    wave_index += 1
+                    continue
+                
+                responses = self._dispatch_cse_queries([query for query, collect in queries], credentials)
+                
+                # Check for quota/rate limit errors; retry the wave with the next key that has quota
+                quota_error = next(filter(None, map(self._cse_quota_error, responses)), None)
+                if quota_error:
+                    self._fallback_event(quota_error)
+                    self.cse_keys.record_exhausted(credentials['id'], quota_error)
+                    credentials = self.cse_keys.acquire()
+                    if credentials is None:
+                        print("No Google API key has quota left. Falling back to web scraping.")
+                        return None  # Return None to trigger fallback
+                    continue
+                
+                # Results are applied in plan order so earlier queries keep priority
+                for (query, collect), response in zip(queries, responses):
+                    if response.status_code == 200:
+                        collect(response.json(), found, business_name)
+                
+                if found.get('instagram') and found.get('facebook') and found.get('website'):
+                    break
+                wave_index += 1
+                
+        except requests.exceptions.RequestException as e:
+            # Network errors - fall back to web scraping
+            print(f"Google API network error: {e}. Falling back to web scraping.")
+            return None
+        except Exception as e:
+            error_str = str(e).lower()
+            if 'quota' in error_str or 'limit' in error_str or '403' in error_str or '429' in error_str:
+                print(f"Google API quota/limit error: {e}. Falling back to web scraping.")
+                return None
+            print(f"Google API search error: {e}")
+        
+        return found if found else None
+    
+    def _dispatch_cse_queries(self, queries, credentials):
+        """Send Custom Search queries concurrently under the shared rate limit, returning responses in order"""
+        def send(query):
+            self.cse_rate_limiter.acquire()
+            self._count('cse_queries')
+            self.cse_keys.record_use(credentials['id'])
+            return self._fetch(CSE_URL, params=self._cse_params(query, credentials))
+        
+        if len(queries) == 1:
+            return [send(queries[0])]
+        
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, send, query) for query in queries]
+            return [future.result() for future in futures]
+    
+    def _cse_query_waves(self, business_name, country):
+        """
+        Plan the Custom Search queries as waves of (query, link types it looks for, collector).
+        The first wave merges the Instagram and Facebook searches into one query;
+        later waves are narrower fallbacks for whatever is still missing.
+        """
+        social = self._collect_cse_social
+        website = self._collect_cse_website
+        return [
+            [
+                (f'"{business_name}" {country} (site:instagram.com OR site:facebook.com)', ('instagram', 'facebook'), social),
+                (f'"{business_name}" {country} official website', ('website',), website),
+            ],
+            [
+                (f"{business_name} {country} instagram", ('instagram',), social),
+                (f"{business_name} {country} facebook", ('facebook',), social),
+                (f"{business_name} {country} website", ('website',), website),
+            ],
+            [
+                (f"{business_name} {country} facebook page", ('facebook',), social),
+                (f"{business_name} {country} site", ('website',), website),
+            ],
+        ]
+    
+    def _cse_params(self, query, credentials):
+        return {
+            'key': credentials['api_key'],
+            'cx': credentials['cse_id'],
+            'q': query
+        }
+    
+    def _cse_quota_error(self, response):
+        """Check a Custom Search response for quota/rate limit errors, returning QUOTA_EXCEEDED, RATE_LIMITED or None"""
+        if response.status_code == 403:
+            try:
+                error_data = response.json() if response.text else {}
+                error_message = error_data.get('error', {}).get('message', '')
+                if 'quota' in error_message.lower() or 'limit' in error_message.lower():
+                    return QUOTA_EXCEEDED
+            except:
+                pass
+        
+        if response.status_code == 429:
+            return RATE_LIMITED
+        
+        return None
+    
+    def _collect_cse_social(self, data, found, business_name):
+        """Pick Instagram, Facebook and website links out of a social media query's results"""
+        for item in data.get('items', []):
+            link = item.get('link', '')
+            snippet = item.get('snippet', '') or item.get('htmlSnippet', '')
+            
+            # Prioritize Instagram
+            if 'instagram.com' in link and not found.get('instagram'):
+                found['instagram'] = self._normalize_instagram_url(link)
+            # Then Facebook
+            elif 'facebook.com' in link and not found.get('facebook'):
+                found['facebook'] = self._normalize_facebook_url(link)
+            # Then check for websites (but skip if it's social media)
+            elif not found.get('website') and self._is_likely_website(link, business_name):
+                # Additional check: make sure it's not a directory/review site
+                skip_domains = ['yelp', 'tripadvisor', 'zomato', 'foursquare', 
+                               'opentable', 'google.com/maps', 'google.com/search']
+                if not any(skip in link.lower() for skip in skip_domains):
+                    found['website'] = link
+            
+            # Also try to extract website from snippet text
+            if not found.get('website') and snippet:
+                extracted = self._extract_website_from_text(snippet, business_name)
+                if extracted:
+                    found['website'] = extracted
+            
+            if found.get('instagram') and found.get('facebook'):
+                break
+    
+    def _collect_cse_website(self, data, found, business_name):
+        """Pick a website link out of a website query's results"""
+        for item in data.get('items', []):
+            link = item.get('link', '')
+            snippet = item.get('snippet', '') or item.get('htmlSnippet', '')
+            
+            # Skip social media links in website search
+            if 'instagram.com' in link or 'facebook.com' in link:
+                continue
+            
+            # Check if link is a website
+            if not found.get('website') and self._is_likely_website(link, business_name):
+                skip_domains = ['yelp', 'tripadvisor', 'zomato', 'foursquare', 
+                               'opentable', 'google.com', 'bing.com', 'yahoo.com',
+                               'wikipedia.org', 'support.google', 'maps.google']
+                if not any(skip in link.lower() for skip in skip_domains):
+                    found['website'] = link
+            
+            # Also try to extract website from snippet text
+            if not found.get('website') and snippet:
+                extracted = self._extract_website_from_text(snippet, business_name)
+                if extracted:
+                    found['website'] = extracted
+            
+            if found.get('website'):
+                break
+    
+    @timed_stage('google_web')
+    def _search_google(self, business_name, country, cancel=None):
+        """
+        Search Google for business social media links (web scraping fallback)
+        Stops before the next query once cancel (a threading.Event) is set.
+        """
+        found = {}
+        
+        for query in self._google_queries(business_name, country):
+            if cancel is not None and cancel.is_set():
+                break
+            try:
+                search_url = f"https://www.google.com/search?q={quote(query)}"
+                response = self._fetch(search_url)
+                
+                if response.status_code == 200:
+                    self._collect_google_page(response.text, found, business_name)
+                    
+                    # Don't break early - continue searching for website even if we have social media
+                    if found.get('instagram') and found.get('facebook') and found.get('website'):
+                        break
+                
+                self._sleep(1, cancel)  # Be respectful with rate limiting
+            except BudgetExceeded:
+                self._mark_stage('google_web', 'incomplete')
+                break
+            except Exception as e:
+                print(f"Google search error: {e}")
+        
+        return found if found else None
+    
+    def _google_queries(self, business_name, country):
+        return [
+            f"{business_name} {country} instagram",
+            f"{business_name} {country} facebook",
+            f'"{business_name}" {country} official website',
+            f"{business_name} {country} website"
+        ]
+    
+    def _collect_google_page(self, content, found, business_name):
+        """Extract links from a Google results page into found, keeping earlier finds"""
+        # One scan of the page yields candidates for every platform
+        links = extract_links(content, business_name)
+        for platform in ('instagram', 'facebook', 'website'):
+            if not found.get(platform) and links[platform]:
+                found[platform] = links[platform][0]
+    
+    @timed_stage('instagram_direct')
+    def _search_instagram_direct(self, business_name, country):
+        """
+        Try to construct or find Instagram link directly using common patterns
+        """
+        potential_urls = self._instagram_direct_urls(business_name, country)
+        found = self._probe_candidates(potential_urls, self._verify_instagram_link, business_name, 'instagram_direct')
+        self._record_probe('instagram', business_name, country, found)
+        return found
+    
+    def _instagram_direct_urls(self, business_name, country):
+        """Profile URLs to probe for a business, in priority order"""
+        plan = name_plan(business_name, country)
+        return [f"https://www.instagram.com/{handle}/" for handle in self._ordered_handles('instagram', plan, plan.handles)]
+    
+    def _ordered_handles(self, platform, plan, default):
+        """The handles to probe on a platform: default, or the order learned from past hits once there are enough"""
+        if self.probe_stats is None:
+            return default
+        return self.probe_stats.order(platform, plan.country_code, plan.all_handles, plan.handle_patterns, default)
+    
+    def _record_probe(self, platform, business_name, country, found_url):
+        """Count a finished direct search and the handle patterns of the URL it verified, if any"""
+        if self.probe_stats is None:
+            return
+        lookup = _current_lookup.get()
+        if found_url is None and lookup is not None and f'{platform}_direct' in lookup.stage_report():
+            return  # Cut short by the deadline: says nothing about which patterns work
+        plan = name_plan(business_name, country)
+        patterns = ()
+        if found_url:
+            patterns = plan.handle_patterns.get(found_url.rstrip('/').rsplit('/', 1)[-1], ())
+        self.probe_stats.record(platform, plan.country_code, patterns)
+    
+    def _probe_candidates(self, urls, verify, business_name, stage):
+        """
+        Verify candidate URLs concurrently and return the first one (in list order) that verifies.
+        Probes for lower-priority candidates are cancelled as soon as the answer is decided.
+        When the discovery methods run out of time, the best candidate verified so far is
+        returned and stage is marked incomplete.
+        """
+        if not urls:
+            return None
+        
+        outcomes = [None] * len(urls)
+        next_index = 0  # Highest-priority candidate whose outcome is still needed
+        executor = ThreadPoolExecutor(max_workers=min(self.probe_workers, len(urls)))
+        try:
+            # Each probe runs in a copy of the caller's context so it shares the lookup's memo
+            futures = {executor.submit(contextvars.copy_context().run, verify, url, business_name): i
+                       for i, url in enumerate(urls)}
+            for future in as_completed(futures, timeout=self._methods_remaining()):
+                try:
+                    outcomes[futures[future]] = bool(future.result())
+                except BudgetExceeded:
+                    self._mark_stage(stage, 'incomplete')
+                    outcomes[futures[future]] = False
+                except Exception as e:
+                    print(f"Probe error: {e}")
+                    outcomes[futures[future]] = False
+                
+                # Advance past resolved misses; stop once the best remaining candidate verified
+                while next_index < len(urls) and outcomes[next_index] is False:
+                    next_index += 1
+                if next_index == len(urls):
+                    return None
+                if outcomes[next_index]:
+                    return urls[next_index]
+        except FuturesTimeout:
+            self._mark_stage(stage, 'incomplete')
+            return next((url for url, verified in zip(urls, outcomes) if verified), None)
+        finally:
+            # Drop queued probes; running ones finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return None
+    
+    def _get_country_code(self, country):
+        """Get country code abbreviation from country name"""
+        return country_code(country)
+    
+    def _generate_username_variations(self, business_name, country=None):
+        """Generate possible username variations from business name"""
+        return list(name_plan(business_name, country).handles)
+    
+    @timed_stage('facebook_direct')
+    def _search_facebook_direct(self, business_name, country):
+        """
+        Try to find Facebook page using direct URL patterns
+        """
+        potential_urls = self._facebook_direct_urls(business_name, country)
+        found = self._probe_candidates(potential_urls, self._verify_facebook_link, business_name, 'facebook_direct')
+        self._record_probe('facebook', business_name, country, found)
+        return found
+    
+    def _facebook_direct_urls(self, business_name, country):
+        """Page URLs to probe for a business, in priority order (country code variations first)"""
+        plan = name_plan(business_name, country)
+        return [f"https://www.facebook.com/{handle}/"
+                for handle in self._ordered_handles('facebook', plan, plan.facebook_handles)]
+    
+    def _extract_instagram_from_text(self, text):
+        """
+        Extract Instagram URL from text content
+        """
+        candidates = extract_links(text)['instagram']
+        return candidates[0] if candidates else None
+    
+    def _extract_facebook_from_text(self, text):
+        """
+        Extract Facebook URL from text content
+        """
+        candidates = extract_links(text)['facebook']
+        return candidates[0] if candidates else None
+    
+    def _normalize_instagram_url(self, url):
+        """Normalize Instagram URL format"""
+        match = INSTAGRAM_PATH_RE.search(url)
+        if match:
+            return f"https://www.instagram.com/{match.group(1)}/"
+        return url
+    
+    def _normalize_facebook_url(self, url):
+        """Normalize Facebook URL format"""
+        match = FACEBOOK_PATH_RE.search(url)
+        if match:
+            return f"https://www.facebook.com/{match.group(1)}/"
+        return url
+    
+    def _is_likely_website(self, url, business_name):
+        """Check if a URL is likely an official business website"""
+        return is_likely_website(url)
+    
+    def _extract_website_from_text(self, text, business_name):
+        """Extract website URL from text content"""
+        candidates = extract_links(text, business_name)['website']
+        return candidates[0] if candidates else None
+    
+    @timed_stage('website')
+    def _search_website(self, business_name, country):
+        """
+        Search for official business website: resolve every guessed host at once, then
+        probe the ones that exist concurrently (the earliest guess that verifies wins)
+        """
+        candidates = self._website_candidates(business_name, country)
+        if self.dns_cache is not None:
+            candidates = self._drop_unresolvable(candidates, self._resolve_hosts(candidates))
+        return self._probe_candidates(candidates, self._verify_website_link, business_name, 'website')
+    
+    @timed_stage('dns')
+    def _resolve_hosts(self, urls):
+        return self.dns_cache.resolve_all([urlparse(url).hostname for url in urls])
+    
+    def _drop_unresolvable(self, urls, answers):
+        """Keep the URLs whose host resolves or couldn't be checked"""
+        kept = [url for url in urls if answers.get(urlparse(url).hostname) is not False]
+        if len(kept) < len(urls):
+            self._count('dns_skipped', len(urls) - len(kept))
+        return kept
+    
+    def _website_candidates(self, business_name, country):
+        """Guess website URLs for a business from common domain patterns"""
+        return [f"https://{domain}" for domain in name_plan(business_name, country).domains]
+    
+    @timed_stage('verify_website')
+    def _verify_website_link(self, url, business_name):
+        """Verify that the website link is valid and matches the business"""
+        if self.negative_cache.get(url):
+            return False
+        
+        try:
+            response = self._fetch_page(url, self._website_read_done)
+            
+            # Redirect statuses (301, 302, etc.) - check redirect URL
+            if response.status_code in [301, 302, 303, 307, 308] and response.url != url:
+                # Recursively check redirect (but limit to avoid infinite loops)
+                return self._verify_website_link(response.url, business_name)
+            
+            return self._check_website_response(url, response, business_name)
+                
+        except BudgetExceeded:
+            raise  # Undecided, not invalid
+        except requests.exceptions.RequestException as e:
+            # Network errors - don't assume invalid, might be temporary
+            # (unless the domain doesn't resolve at all)
+            if is_dns_failure(e):
+                self.negative_cache.add(url, DNS_FAILURE)
+            print(f"Website verification network error: {e}")
+            return False
+        except Exception as e:
+            print(f"Website verification error: {e}")
+            return False
+    
+    def _website_read_done(self, text):
+        """The error sample and the title tags of a home page have been read"""
+        return len(text) >= WEBSITE_ERROR_SAMPLE_SIZE and '</head>' in text
+    
+    def _check_website_response(self, url, response, business_name):
+        """
+        Decide whether a fetched website matches the business.
+        response needs status_code, url and text attributes.
+        """
+        if response.status_code == 200:
+            content = response.text.lower()
+            
+            # Check for explicit error pages (be more specific to avoid false positives)
+            # Only check in first part of content where error messages typically appear
+            content_sample = content[:WEBSITE_ERROR_SAMPLE_SIZE]
+            
+            # More specific error patterns that indicate actual error pages
+            explicit_errors = [
+                'page not found',
+                '404 error',
+                'error 404',
+                'not found',
+                'domain for sale',
+                'this domain is for sale',
+                'buy this domain',
+                'parked domain',
+                'domain parking'
+            ]
+            
+            # Check if multiple error indicators appear (more likely to be real error)
+            error_count = sum(1 for error in explicit_errors if error in content_sample)
+            if error_count >= 2:  # Multiple error indicators = likely error page
+                self.negative_cache.add(url, ERROR_PAGE)
+                return False
+            
+            # Check for single strong error indicators
+            strong_errors = ['domain for sale', 'this domain is for sale', 'buy this domain', 'parked domain']
+            if any(error in content_sample for error in strong_errors):
+                self.negative_cache.add(url, ERROR_PAGE)
+                return False
+            
+            # Try to extract page title (use original text, not lowercased)
+            title_match = re.search(r'<title[^>]*>([^<]+)</title>', response.text, re.IGNORECASE)
+            og_title_match = re.search(r'<meta[^>]*property=["\']og:title["\'][^>]*content=["\']([^"\']+)["\']', response.text, re.IGNORECASE)
+            
+            title = None
+            if og_title_match:
+                title = og_title_match.group(1)
+            elif title_match:
+                title = title_match.group(1)
+            
+            if title:
+                # Check if business name appears in title (with some similarity)
+                similarity = self._similarity(business_name, title)
+                if similarity > 0.2:  # Lowered threshold
+                    return True
+                # Also check if business name words appear in title
+                business_words = [w for w in business_name.lower().split() if len(w) > 2]
+                title_lower = title.lower()
+                matching_words = sum(1 for word in business_words if word in title_lower)
+                if business_words and matching_words >= max(1, len(business_words) * 0.4):  # At least 40% match
+                    return True
+            
+            # Check domain name matches business name
+            domain_match = re.search(r'https?://(?:www\.)?([^/]+)', url.lower())
+            if domain_match:
+                domain = domain_match.group(1)
+                # Remove TLD
+                domain_name = re.sub(r'\.[a-z]{2,}$', '', domain)
+                # Check if business name appears in domain
+                clean_business = re.sub(r'[^a-z0-9]', '', business_name.lower())
+                clean_domain = re.sub(r'[^a-z0-9]', '', domain_name)
+                if clean_business and clean_domain:
+                    if clean_business in clean_domain or clean_domain in clean_business:
+                        return True
+                    # Check if significant portion matches
+                    if len(clean_business) >= 3 and len(clean_domain) >= 3:
+                        # Check for substring match of at least 3 chars
+                        for i in range(len(clean_business) - 2):
+                            substr = clean_business[i:i+3]
+                            if substr in clean_domain:
+                                return True
+            
+            # If page loads successfully (200) and no strong error indicators, assume valid
+            # Many legitimate sites might not have perfect title matches
+            return True
+        
+        elif response.status_code == 404:
+            self.negative_cache.add(url, NOT_FOUND)
+            return False
+        
+        # For other codes, be lenient
+        return True
+    
+    @timed_stage('verify_instagram')
+    def _verify_instagram_link(self, url, business_name):
+        """
+        Verify that the Instagram link is valid and potentially matches the business
+        """
+        if self.negative_cache.get(url):
+            return False
+        
+        try:
+            response = self._fetch_page(url, self._instagram_read_done)
+            return self._check_instagram_response(url, response, business_name)
+        except BudgetExceeded:
+            raise  # Undecided, not invalid
+        except Exception as e:
+            if is_dns_failure(e):
+                self.negative_cache.add(url, DNS_FAILURE)
+            print(f"Instagram verification error: {e}")
+        
+        return False
+    
+    def _instagram_read_done(self, text):
+        # The title comes early, so only an error message can settle the check before the byte cap
+        return any(indicator in text for indicator in INSTAGRAM_ERROR_INDICATORS)
+    
+    def _check_instagram_response(self, url, response, business_name):
+        """Decide whether a fetched Instagram page is a live profile"""
+        if response.status_code == 404:
+            self.negative_cache.add(url, NOT_FOUND)
+        elif response.status_code == 200:
+            content = response.text.lower()
+            
+            # Check if page doesn't exist
+            if any(indicator in content for indicator in INSTAGRAM_ERROR_INDICATORS):
+                self.negative_cache.add(url, ERROR_PAGE)
+                return False
+            
+            # Try to extract profile name and compare with business name
+            # Instagram pages often have the business name in the title or meta tags
+            title_match = re.search(r'<title[^>]*>([^<]+)</title>', content, re.IGNORECASE)
+            if title_match:
+                title = title_match.group(1)
+                # Check if business name appears in title (with some similarity threshold)
+                if self._similarity(business_name, title) > 0.3:
+                    return True
+            
+            # If no error indicators, assume valid
+            return True
+        
+        return False
+    
+    def _facebook_page_name(self, url):
+        """Return the page name from a Facebook URL, or None if it can't be a business page"""
+        # Extract username from URL first
+        username_match = re.search(r'facebook\.com/([^/?]+)', url.lower())
+        if not username_match:
+            return None
+        
+        username = username_match.group(1)
+        if not username or len(username) < 2:
+            return None
+        
+        # Skip common Facebook paths that aren't pages
+        skip_paths = ['pages', 'profile', 'people', 'login', 'home', 'watch', 'marketplace', 'groups', 'events']
+        if username in skip_paths:
+            return None
+        
+        return username
+    
+    @timed_stage('verify_facebook')
+    def _verify_facebook_link(self, url, business_name):
+        """
+        Verify that the Facebook link is valid and potentially matches the business
+        Facebook requires login for most pages, so we use a more lenient approach
+        """
+        if not self._facebook_page_name(url):
+            return False
+        
+        if self.negative_cache.get(url):
+            return False
+        
+        try:
+            response = self._fetch_page(url, self._facebook_read_done)
+            return self._check_facebook_response(url, response)
+        except BudgetExceeded:
+            raise  # Undecided, unlike network errors which give the page the benefit of the doubt
+        except requests.exceptions.RequestException:
+            # Network errors - don't assume page doesn't exist, the URL structure looks valid
+            return True
+        except Exception as e:
+            print(f"Facebook verification error: {e}")
+            return False
+    
+    def _facebook_read_done(self, text):
+        return any(indicator in text for indicator in FACEBOOK_ERROR_INDICATORS)
+    
+    def _check_facebook_response(self, url, response):
+        """Decide whether a fetched Facebook page exists"""
+        # If we get a 200 response, check for error indicators
+        if response.status_code == 200:
+            content = response.text.lower()
+            
+            # Check for explicit error messages (these indicate page doesn't exist)
+            if any(indicator in content for indicator in FACEBOOK_ERROR_INDICATORS):
+                self.negative_cache.add(url, ERROR_PAGE)
+                return False
+            
+            # If we got here with a 200 response and no errors, the page exists
+            # Facebook may show login page, but that means the page URL is valid
+            return True
+        
+        # For other status codes, be more cautious
+        elif response.status_code == 404:
+            self.negative_cache.add(url, NOT_FOUND)
+            return False
+        
+        # For other status codes, assume it might exist (could be temporary issues)
+        return True
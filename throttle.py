@@ -0,0 +1,74 @@
+"""
+Rate limiting for outbound requests.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """Spaces out events so that at most `rate` happen per second (0 disables limiting)"""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next free slot and return how many seconds to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+    def acquire(self):
+        """Block until the next free slot"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HostRateLimiter:
+    """
+    A RateLimiter per host name. A rate set for a domain also covers its
+    subdomains (instagram.com limits www.instagram.com); hosts without a
+    configured rate are not limited.
+    """
+    def __init__(self, rates=None):
+        self._limiters = {host.lower(): RateLimiter(rate) for host, rate in (rates or {}).items()}
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Parse 'host=rate,host=rate' (requests per second), e.g. 'www.google.com=0.5,instagram.com=5'"""
+        rates = {}
+        for entry in (spec or '').split(','):
+            host, _, rate = entry.strip().partition('=')
+            if host and rate:
+                rates[host.strip()] = float(rate)
+        return cls(rates)
+
+    def __bool__(self):
+        return bool(self._limiters)
+
+    def set_rate(self, host, rate):
+        self._limiters[host.lower()] = RateLimiter(rate)
+
+    def _limiter_for(self, url):
+        host = (urlparse(url).hostname or '').lower()
+        while host:
+            limiter = self._limiters.get(host)
+            if limiter is not None:
+                return limiter
+            host = host.partition('.')[2]
+        return None
+
+    def reserve(self, url):
+        """Claim the next free slot for url's host and return how many seconds to wait for it"""
+        limiter = self._limiter_for(url) if self._limiters else None
+        return limiter.reserve() if limiter is not None else 0.0
+
+    def acquire(self, url):
+        """Block until url's host may be requested again"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
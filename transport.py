@@ -0,0 +1,146 @@
+"""
+Pooled HTTP transport shared by every lookup thread.
+
+requests.Session objects are not safe to share between threads (cookies and
+adapter state are mutated per request), so each thread gets its own session.
+The sessions all mount the same adapters, so connections are pooled and kept
+alive across threads and lookups: the hosts every lookup talks to (Google,
+the Custom Search API, Instagram, Facebook) each get a dedicated pool sized
+for concurrent use, and all other hosts share a default adapter.
+
+Connection failures and gateway errors are retried with exponential backoff
+plus random jitter. Rate limiting (429) is not retried here: the Custom Search
+key pool and the callers handle it. Neither are unresolvable host names, which
+are the normal outcome of probing guessed website domains.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from negative_cache import is_dns_failure
+
+# Connections kept per host for the hosts on every lookup's path
+DEFAULT_POOL_SIZES = {
+    'www.google.com': 16,
+    'www.googleapis.com': 16,
+    'www.instagram.com': 32,
+    'www.facebook.com': 32,
+}
+
+# Gateway/server errors worth a second try; 429 is left to the callers
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class _Retry(Retry):
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if error is not None and is_dns_failure(error):
+            raise MaxRetryError(_pool, url, error) from error
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def build_retry(retries, backoff, jitter):
+    kwargs = dict(
+        total=retries,
+        connect=retries,
+        read=min(retries, 1),  # A slow page is rarely faster the second time
+        status=retries,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        backoff_factor=backoff,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        raise_on_redirect=False,
+    )
+    try:
+        return _Retry(backoff_jitter=jitter, **kwargs)
+    except TypeError:
+        return _Retry(**kwargs)  # urllib3 < 2 has no backoff_jitter
+
+
+def parse_pool_sizes(spec):
+    """Parse 'host=size,host=size', e.g. 'www.instagram.com=64,www.google.com=8'"""
+    sizes = {}
+    for entry in (spec or '').split(','):
+        host, _, size = entry.strip().partition('=')
+        if host and size:
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+class HTTPTransport:
+    """
+    Drop-in for the session.get()/session.headers used by the finder, safe to
+    call from any number of threads
+    """
+    def __init__(self, headers=None, pool_sizes=None, default_pool_size=10, pool_hosts=100,
+                 retries=2, backoff=0.3, jitter=0.2):
+        self.headers = dict(headers or {})
+        self.retry = build_retry(retries, backoff, jitter)
+        self.pool_sizes = dict(DEFAULT_POOL_SIZES)
+        self.pool_sizes.update(pool_sizes or {})
+        # Other hosts (business websites) share one adapter holding pools for up to pool_hosts hosts
+        self.default_adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=default_pool_size,
+                                           max_retries=self.retry)
+        self.host_adapters = {}
+        for host, size in self.pool_sizes.items():
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=size, max_retries=self.retry)
+            for scheme in ('https', 'http'):
+                self.host_adapters[f'{scheme}://{host}/'] = adapter
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls, headers=None):
+        """Build a transport from HTTP_POOL_SIZES, HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_RETRY_BACKOFF and HTTP_RETRY_JITTER"""
+        return cls(
+            headers,
+            pool_sizes=parse_pool_sizes(os.getenv('HTTP_POOL_SIZES', '')),
+            default_pool_size=int(os.getenv('HTTP_POOL_SIZE', '10')),
+            retries=int(os.getenv('HTTP_RETRIES', '2')),
+            backoff=float(os.getenv('HTTP_RETRY_BACKOFF', '0.3')),
+            jitter=float(os.getenv('HTTP_RETRY_JITTER', '0.2'))
+        )
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.default_adapter)
+            session.mount('http://', self.default_adapter)
+            for prefix, adapter in self.host_adapters.items():
+                session.mount(prefix, adapter)
+            self._local.session = session
+        # Headers changed on the transport apply to every thread's session
+        session.headers.update(self.headers)
+        return session
+
+    def get(self, url, **kwargs):
+        return self._session().get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self._session().head(url, **kwargs)
+
+    def prewarm(self, hosts=None, timeout=5.0):
+        """
+        Open a kept-alive TLS connection to each host (default: the hosts with dedicated pools)
+        on background threads, so the first lookup doesn't pay for the handshakes. Returns the threads.
+        """
+        def warm(host):
+            try:
+                self.head(f'https://{host}/', timeout=timeout, allow_redirects=False).close()
+            except requests.exceptions.RequestException as e:
+                print(f"TLS pre-warm of {host} failed: {e}")
+
+        threads = [threading.Thread(target=warm, args=(host,), name=f'prewarm-{host}', daemon=True)
+                   for host in (hosts or self.pool_sizes)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def close(self):
+        """Close every pooled connection (the transport stays usable and reconnects on demand)"""
+        for adapter in {self.default_adapter, *self.host_adapters.values()}:
+            adapter.close()